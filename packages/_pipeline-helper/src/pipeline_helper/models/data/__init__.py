@@ -1,9 +1,8 @@
 """Output data model."""
 
-from typing import Generic
+from typing import TYPE_CHECKING, Generic
 
 from context_models.validators import context_field_validator
-from matplotlib.figure import Figure
 from pandas import DataFrame
 from pydantic import BaseModel, Field
 
@@ -15,6 +14,9 @@ from pipeline_helper.models.path import (
 from pipeline_helper.sync_dvc.types import DvcValidationInfo
 from pipeline_helper.sync_dvc.validators import dvc_append_plot_name
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 class Dfs(BaseModel, arbitrary_types_allowed=True):
     """Data frames."""
@@ -32,7 +34,7 @@ class Plots(PipelineHelperContextStore, arbitrary_types_allowed=True):
 
     @context_field_validator("*", mode="after")
     @classmethod
-    def dvc_validate_plot(cls, figure: Figure, info: DvcValidationInfo) -> Figure:
+    def dvc_validate_plot(cls, figure: "Figure", info: DvcValidationInfo) -> "Figure":
         """Append plot name for `dvc.yaml`."""
         return dvc_append_plot_name(figure, info)
 
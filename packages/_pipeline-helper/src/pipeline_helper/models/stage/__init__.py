@@ -44,7 +44,7 @@ class Stage(PipelineHelperContextStore):
     @context_field_validator("*", mode="after")
     @classmethod
     def dvc_add_param(cls, value: Any, info: DvcValidationInfo) -> Any:
-        """Add param to global parameters and stage command for `dvc.yaml`."""
+        """Add param to the stage's parameters table for `dvc.yaml`."""
         return dvc_add_param(value, info, fields=cls.model_fields)
 
 
@@ -15,7 +15,7 @@ from pydantic.alias_generators import to_pascal
 from yaml import safe_dump, safe_load
 
 from pipeline_helper.environment import run
-from pipeline_helper.sync_dvc import SyncDvc, const
+from pipeline_helper.sync_dvc import SyncDvc
 from pipeline_helper.sync_dvc.contexts import DVC, DvcContext, DvcContexts
 from pipeline_helper.sync_dvc.dvc import DvcYamlModel, Stage
 from pipeline_helper.sync_dvc.types import Model
@@ -85,9 +85,9 @@ def get_dvc_context(params: dict[str, Any], stages: str) -> DvcContext:
         },
         **{
             field: {
-                k: (("--no" not in v) if isinstance(v, str) and "--" in v else v)
-                for k, v in params[const.table_key].items()
-                if k in stage.model_fields
+                name: v
+                for k, v in params.get(field, {}).items()
+                if (name := k.replace("-", "_")) in stage.model_fields
             }
             for field, stage in stage_models.items()
             if field != CONTEXT
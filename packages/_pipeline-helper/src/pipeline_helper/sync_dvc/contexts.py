@@ -18,7 +18,9 @@ class DvcContext(BaseModel):
     model: DvcYamlModel = Field(default_factory=DvcYamlModel)
     """Synchronized `dvc.yaml` configuration."""
     params: dict[str, Any] = Field(default_factory=dict)
-    """DVC `params.yaml` synchronized to `dvc.yaml`."""
+    """DVC `params.yaml` synchronized to `dvc.yaml`, with a table for each stage."""
+    name: str = ""
+    """Current stage name, and the key of its parameters table."""
     stage: Stage = Field(default_factory=lambda: Stage(cmd=""))
     """Current stage."""
     only_sample: str = ""
@@ -2,29 +2,27 @@
 
 from collections.abc import Sequence
 from datetime import datetime
-from itertools import chain
 from pathlib import Path
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
 from cappa.arg import Arg
 from context_models import CONTEXT
-from matplotlib.figure import Figure
 from more_itertools import first
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
 from pydantic.functional_validators import ModelWrapValidatorHandler
 
-from pipeline_helper import sync_dvc
 from pipeline_helper.sync_dvc.contexts import DVC
 from pipeline_helper.sync_dvc.dvc import OutFlags, Stage
 from pipeline_helper.sync_dvc.types import DvcValidationInfo, Model
 
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
 
 class Constants(BaseModel):
     """Constants."""
 
-    table_key: str = sync_dvc.const.table_key
-    """Key for the global parameters table."""
     out_config: OutFlags = OutFlags(persist=True)
     """Default `dvc.yaml` configuration for `outs`."""
     skip_cloud: list[str] = ["data/mboxes", "data/reqs"]
@@ -45,70 +43,56 @@ def dvc_prepare_stage(
     """Prepare a pipeline stage for `dvc.yaml`."""
     if not (dvc := info.context.get(DVC)):
         return handler(data)
-    if not dvc.model.stages:
-        dvc.params[const.table_key] = {}
     name = model.__module__.split(".")[-1]
     if dvc.model.stages.get(name):
         return handler(data)
+    dvc.name = name
+    dvc.params[name] = {}
     dvc.stage = Stage(cmd="")
-    dvc.stage.params.append(const.table_key)
     dvc.model.stages[name] = dvc.stage
     sep = " "
-    dvc.stage.cmd = sep.join([
-        "./j.ps1 gjob-pipeline",
-        f"stage {name.replace('_', '-')}",
-    ])
+    args = ["./j.ps1 gjob-pipeline", f"stage {name.replace('_', '-')}"]
     self = handler(data)
-    dvc.stage.cmd = f'pwsh -Command "{dvc.stage.cmd}"'
+    # ? Pass parameters as flags, rendered by DVC's dictionary unpacking
+    if dvc.params[name]:
+        dvc.stage.params.append(name)
+        args.append(f"${{{name}}}")
+    dvc.stage.cmd = f'pwsh -Command "{sep.join(args)}"'
     return self
 
 
 def dvc_add_param(
     value: Any, info: DvcValidationInfo, fields: dict[str, FieldInfo]
 ) -> Any:
-    # sourcery skip: low-code-quality
-    """Add param to global parameters and stage command for `dvc.yaml`."""
+    """Add param to the stage's parameters table for `dvc.yaml`.
+
+    Keys are the stage's flags, and values are typed so that DVC renders booleans as
+    `--flag` or `--no-flag`, and lists as a flag repeated for each item. Unset values
+    are left out, as DVC would render them as `None`.
+    """
     param = first(
         (m for m in fields[info.field_name].metadata if isinstance(m, Arg)), default=Arg
     )
-    if (
+    if not (
         (dvc := info.context.get(DVC))
         and not param.hidden
-        and (params := dvc.params.get(const.table_key)) is not None
-    ) and isinstance(value, Sequence | bool | int | float | complex | datetime):
-        name = info.field_name
-        arg = name.replace("_", "-")
-        sep = " "
-        # ? Add to global parameters list if missing
-        if not params.get(name):
-            if isinstance(value, bool):
-                params[name] = f"--{arg}" if value else f"--no-{arg}"
-            elif not isinstance(value, str) and isinstance(value, Sequence):
-                values = []
-                for v in value:
-                    if isinstance(v, Path):
-                        v = v.as_posix()
-                    elif not isinstance(v, bool | int | float | complex | datetime):
-                        return value
-                    values.append(v)
-                params[name] = sep.join(chain.from_iterable((arg, v) for v in values))
-            else:
-                params[name] = value
-        # ? Append parameter to stage command
-        if isinstance(value, bool) or (
-            not isinstance(value, str) and isinstance(value, Sequence)
-        ):
-            args = [f"${{{const.table_key}.{name}}}"]
-        else:
-            args = [f"--{arg}", f"${{{const.table_key}.{name}}}"]
-        dvc.stage.cmd = sep.join([
-            *(
-                dvc.stage.cmd
-                if isinstance(dvc.stage.cmd, list)
-                else dvc.stage.cmd.split(sep)
-            ),
-            *args,
-        ])
+        and (params := dvc.params.get(dvc.name)) is not None
+    ):
+        return value
+    arg = info.field_name.replace("_", "-")
+    if isinstance(value, bool | int | float | str):
+        params[arg] = value
+    elif isinstance(value, datetime):
+        params[arg] = value.isoformat()
+    elif isinstance(value, Sequence):
+        values = []
+        for v in value:
+            if isinstance(v, Path):
+                v = v.as_posix()
+            elif not isinstance(v, bool | int | float | str):
+                return value
+            values.append(v)
+        params[arg] = values
     return value
 
 
@@ -134,7 +118,7 @@ def dvc_set_stage_path(
     return path
 
 
-def dvc_append_plot_name(figure: Figure, info: DvcValidationInfo) -> Figure:
+def dvc_append_plot_name(figure: "Figure", info: DvcValidationInfo) -> "Figure":
     """Append plot name for `dvc.yaml`."""
     if info.field_name != CONTEXT and (dvc := info.context.get(DVC)):
         dvc.plot_names.append(info.field_name)
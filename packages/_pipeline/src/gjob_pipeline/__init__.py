@@ -2,16 +2,15 @@
 
 from __future__ import annotations
 
-from collections.abc import Iterator, Mapping, Sequence
-from contextlib import contextmanager
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass, field
+from json import loads
 from logging import NOTSET, Handler, StreamHandler, _levelToName
 from logging.config import dictConfig
 from logging.handlers import WatchedFileHandler
 from pathlib import Path
 from shlex import join, split
 from subprocess import CompletedProcess, run
-from tempfile import NamedTemporaryFile
 from typing import Any, Protocol, runtime_checkable
 
 import structlog
@@ -38,22 +37,11 @@ from structlog.processors import (
 from structlog.stdlib import LoggerFactory, ProcessorFormatter, add_logger_name
 from structlog.typing import EventDict, Processor, ProcessorReturnValue, WrappedLogger
 
+from gjob_pipeline.pretty import iter_pretty
+
 
 def prettify(string: str) -> str:
-    with temporary_path() as path:
-        path.write_text(encoding="utf-8", data=string)
-        cmd = f"run prettier --no-color --parser 'json' {path.as_posix()}"
-        return just(*split(cmd)).stdout.strip()
-
-
-@contextmanager
-def temporary_path() -> Iterator[Path]:
-    with NamedTemporaryFile(encoding="utf-8", mode="r", delete=False) as handle:
-        path = Path(handle.name)
-    try:
-        yield path
-    finally:
-        path.unlink(missing_ok=True)
+    return "".join(iter_pretty(loads(string)))
 
 
 def just(*args: str) -> CompletedProcess[str]:
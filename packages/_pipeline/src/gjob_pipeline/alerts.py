@@ -0,0 +1,242 @@
+"""Job alert and job parsing.
+
+Alert bodies are parsed line by line in a single pass. Lines are grouped into
+paragraphs separated by runs of empty lines, and the lengths of those runs delimit the
+parts of the alert layout:
+
+- a header line `"<query>" in <search location>` and a search location line,
+- jobs separated by four empty lines, then a trailing "more jobs" block,
+- a footer of three blocks separated by four empty lines.
+
+Within a job, the logo is followed by two empty lines, the title and company by one
+line each, then the location, source, and `Time icon` line are separated by single
+empty lines.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from re import compile  # noqa: A004
+
+from gjob_pipeline.models import Message
+from gjob_pipeline.records import AlertRecord, JobRecord
+
+BLOCK_GAP = 4
+"""Empty lines separating jobs from each other and from footer blocks."""
+FOOTER_BLOCKS = 3
+"""Blocks in the footer."""
+QUERY_END = '" in '
+"""End of the query in the header line."""
+POSTED_PREFIX = "Time icon "
+"""Start of the line with the date a job was posted."""
+JOB_LAYOUT = ((1, 2), (2, 1), (1, 1), (1, 1), (1, 0))
+"""Minimum lines in each paragraph of a job, and empty lines following them."""
+FULL_TIME = compile(r"\sWork icon (?=.)")
+"""Start of the employment type after the date a job was posted."""
+
+
+class ParseError(ValueError):
+    """Text that could not be parsed."""
+
+    def __init__(self, kind: str, reason: str, line: int):
+        super().__init__(f"Could not parse {kind}: {reason} at line {line}")
+        self.kind = kind
+        """Kind of text, `alert` or `job`."""
+        self.reason = reason
+        """Reason parsing failed."""
+        self.line = line
+        """Line that parsing failed at, starting from one."""
+
+    def __reduce__(self) -> tuple[type[ParseError], tuple[str, str, int]]:
+        return type(self), (self.kind, self.reason, self.line)
+
+
+@dataclass(frozen=True)
+class Failure:
+    """Text that could not be parsed, and why."""
+
+    text: str
+    """Text."""
+    error: ParseError
+    """Error raised when parsing it."""
+
+
+@dataclass(frozen=True)
+class Paragraph:
+    """Consecutive non-empty lines."""
+
+    start: int
+    """Index of the first line."""
+    stop: int
+    """Index past the last line."""
+    gap: int
+    """Empty lines following the paragraph."""
+
+
+def get_newline(text: str) -> str:
+    """Get the newline that text uses, CRLF if it has any, otherwise LF."""
+    return "\r\n" if "\r\n" in text else "\n"
+
+
+def parse_alerts(
+    messages: Iterable[Message],
+    failures: list[Failure] | None = None,
+    strict: bool = False,
+) -> list[AlertRecord]:
+    """Parse job alert messages.
+
+    Parameters
+    ----------
+    messages
+        Job alert messages.
+    failures
+        If given, messages that could not be parsed are appended to it and skipped.
+        Otherwise, the first of them raises.
+    strict
+        Validate each alert with its model, raising if it is invalid.
+    """
+    alerts: list[AlertRecord] = []
+    for message in messages:
+        try:
+            alerts.append(get_alert(message, strict))
+        except ParseError as err:
+            if failures is None:
+                raise
+            failures.append(Failure(message.body, err))
+    return alerts
+
+
+def parse_jobs(
+    texts: Iterable[str], failures: list[Failure] | None = None, strict: bool = False
+) -> list[JobRecord]:
+    """Parse jobs from the job texts of an alert.
+
+    Parameters
+    ----------
+    texts
+        Job texts.
+    failures
+        If given, jobs that could not be parsed are appended to it and skipped.
+        Otherwise, the first of them raises.
+    strict
+        Validate each job with its model, raising if it is invalid.
+    """
+    jobs: list[JobRecord] = []
+    for text in texts:
+        try:
+            jobs.append(get_job(text, strict))
+        except ParseError as err:
+            if failures is None:
+                raise
+            failures.append(Failure(text, err))
+    return jobs
+
+
+def get_alert(message: Message, strict: bool = False) -> AlertRecord:
+    """Parse a job alert message, raising `ParseError` if it isn't one."""
+    newline = get_newline(message.body)
+    lines = get_lines(message.body, newline)
+    header = lines[0]
+    end = header.find(QUERY_END, 2)
+    if not header.startswith('"') or end < 0 or len(header) == end + len(QUERY_END):
+        raise ParseError("alert", "expected header", 1)
+    if len(lines) < 2 or not lines[1]:
+        raise ParseError("alert", "expected search location", 2)
+    blocks: list[tuple[int, int]] = []
+    start = 2
+    for paragraph in iter_paragraphs(lines, start):
+        if paragraph.gap >= BLOCK_GAP:
+            blocks.append((start, paragraph.stop))
+            start = paragraph.stop + paragraph.gap
+    if start < len(lines):
+        raise ParseError("alert", "expected footer to end the alert", start + 1)
+    # ? The last block before the footer links to more jobs, and isn't a job itself
+    if len(blocks) < FOOTER_BLOCKS + 1:
+        raise ParseError("alert", "expected jobs and footer", start + 1)
+    alert = AlertRecord(
+        query=header[1:end].strip(),
+        search_location=lines[1].strip(),
+        received=message.received,
+        jobs=[
+            newline.join(lines[first:last]).strip()
+            for first, last in blocks[: -FOOTER_BLOCKS - 1]
+        ],
+        footer=(newline * (BLOCK_GAP + 1))
+        .join(
+            newline.join(lines[first:last]) for first, last in blocks[-FOOTER_BLOCKS:]
+        )
+        .strip(),
+    )
+    if strict:
+        alert.validate()
+    return alert
+
+
+def get_job(text: str, strict: bool = False) -> JobRecord:
+    """Parse a job from its text in an alert, raising `ParseError` if it can't be."""
+    newline = get_newline(text)
+    lines = get_lines(text, newline)
+    paragraphs = list(iter_paragraphs(lines))
+    if len(paragraphs) != len(JOB_LAYOUT):
+        raise ParseError("job", f"expected {len(JOB_LAYOUT)} paragraphs", len(lines))
+    for paragraph, (size, gap) in zip(paragraphs, JOB_LAYOUT, strict=True):
+        if paragraph.stop - paragraph.start < size or paragraph.gap != gap:
+            raise ParseError("job", "unexpected layout", paragraph.start + 1)
+    logo, title_and_company, location, source, posted_line = (
+        newline.join(lines[p.start : p.stop]) for p in paragraphs
+    )
+    title, company = title_and_company.split(newline, 1)
+    if not posted_line.startswith(POSTED_PREFIX):
+        raise ParseError("job", "expected date posted", paragraphs[-1].start + 1)
+    posted = posted_line.removeprefix(POSTED_PREFIX)
+    full_time = None
+    if match := FULL_TIME.search(posted, 1):
+        posted, full_time = posted[: match.start()], posted[match.end() :]
+    try:
+        posted_date = datetime.strptime(
+            " ".join([posted, str(datetime.now().year).zfill(4)]), "%b %d %Y"
+        ).date()
+    except ValueError as err:
+        raise ParseError(
+            "job", "expected date posted", paragraphs[-1].start + 1
+        ) from err
+    job = JobRecord(
+        title=title,
+        company=company,
+        location=location,
+        source=source.removeprefix("via").strip(),
+        posted=posted_date,
+        full_time=full_time.casefold() == "full-time" if full_time else True,
+        logo=logo,
+    )
+    if strict:
+        job.validate()
+    return job
+
+
+def get_lines(text: str, newline: str) -> list[str]:
+    """Split text into lines, without an empty line for a final newline."""
+    lines = text.split(newline)
+    if len(lines) > 1 and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def iter_paragraphs(lines: list[str], start: int = 0) -> Iterator[Paragraph]:
+    """Iterate over paragraphs in lines from `start`, in a single pass."""
+    first = stop = None
+    for index in range(start, len(lines)):
+        if not lines[index]:
+            if first is not None and stop is None:
+                stop = index
+            continue
+        if first is not None and stop is not None:
+            yield Paragraph(first, stop, index - stop)
+            first = stop = None
+        if first is None:
+            first = index
+    if first is not None:
+        stop = len(lines) if stop is None else stop
+        yield Paragraph(first, stop, len(lines) - stop)
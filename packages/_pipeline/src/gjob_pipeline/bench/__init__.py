@@ -0,0 +1,47 @@
+"""Benchmark getting mail from synthetic mailboxes."""
+
+from pathlib import Path
+
+from cappa.base import command
+from pydantic import BaseModel
+
+
+@command(default_long=True, invoke="gjob_pipeline.bench.__main__.main")
+class Bench(BaseModel):
+    """Benchmark getting mail from synthetic mailboxes, failing past ceilings."""
+
+    root: Path | None = None
+    """Directory for synthetic mailboxes and outputs, or a temporary directory."""
+    messages: int = 10_000
+    """Number of synthetic messages across all mailboxes."""
+    mailboxes: int = 1
+    """Number of synthetic mailboxes."""
+    alert_ratio: float = 0.1
+    """Fraction of synthetic messages that are job alerts."""
+    seed: int = 0
+    """Seed for generating synthetic messages."""
+    workers: int = 1
+    """Number of worker processes parsing mailboxes in parallel."""
+    shard_size: int = 2**28
+    """Approximate size in bytes of shards that large mailboxes are split into."""
+    max_rss: float = 0
+    """Ceiling on peak resident set size in MiB of the benchmarking process, if nonzero."""
+    max_seconds: float = 0
+    """Ceiling on seconds spent getting mail, if nonzero."""
+
+
+class Report(BaseModel):
+    """Benchmark report."""
+
+    messages: int
+    """Number of synthetic messages."""
+    mailbox_bytes: int
+    """Total size of synthetic mailboxes."""
+    seconds: float
+    """Seconds spent getting mail."""
+    messages_per_second: float
+    """Messages processed per second."""
+    peak_rss: float | None
+    """Peak resident set size in MiB of the benchmarking process, if measurable."""
+    bytes_written: int
+    """Total size of outputs written."""
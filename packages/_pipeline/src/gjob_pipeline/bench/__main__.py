@@ -0,0 +1,112 @@
+from contextlib import nullcontext
+from pathlib import Path
+from sys import platform
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from cappa.output import Exit
+
+from gjob_pipeline import get_logger
+from gjob_pipeline.bench import Bench, Report
+from gjob_pipeline.mail.synthetic import write_mbox
+from gjob_pipeline.parser import invoke
+from gjob_pipeline.stages.get_mail import Deps, GetMail, Outs
+from gjob_pipeline.stages.get_mail.__main__ import main as get_mail_main
+
+MIB = 2**20
+"""Bytes in a mebibyte."""
+
+
+def main(params: Bench):
+    """Benchmark getting mail from synthetic mailboxes, failing past ceilings."""
+    with (
+        TemporaryDirectory() if params.root is None else nullcontext(params.root)
+    ) as root:
+        report = bench(Path(root), params)
+    get_logger().msg("bench", **report.model_dump())
+    if params.max_seconds and report.seconds > params.max_seconds:
+        raise Exit(
+            f"Took {report.seconds:.1f} s, over the {params.max_seconds} s ceiling.",
+            code=1,
+        )
+    if params.max_rss and report.peak_rss and report.peak_rss > params.max_rss:
+        raise Exit(
+            f"Peak RSS {report.peak_rss:.1f} MiB over the"
+            f" {params.max_rss} MiB ceiling.",
+            code=1,
+        )
+
+
+def bench(root: Path, params: Bench) -> Report:
+    """Write synthetic mailboxes to a directory and time getting mail from them."""
+    mboxes = root / "mboxes"
+    mboxes.mkdir(parents=True, exist_ok=True)
+    counts = [
+        len(range(i, params.messages, params.mailboxes))
+        for i in range(params.mailboxes)
+    ]
+    mailbox_bytes = sum(
+        write_mbox(
+            mboxes / f"{i}.mbox",
+            count,
+            alert_ratio=params.alert_ratio,
+            seed=params.seed + i,
+            start=sum(counts[:i]),
+        )
+        for i, count in enumerate(counts)
+    )
+    get_mail = GetMail(
+        deps=Deps(mboxes=mboxes),
+        outs=Outs(
+            mail=root / "mail.json",
+            mail_headers=root / "mail_headers",
+            mail_imap=root / "mail_imap.json",
+            mail_index=root / "mail_index.sqlite",
+            mail_manifest=root / "mail_manifest.json",
+        ),
+        workers=params.workers,
+        shard_size=params.shard_size,
+        incremental=False,
+    )
+    start = perf_counter()
+    get_mail_main(get_mail)
+    seconds = perf_counter() - start
+    return Report(
+        messages=params.messages,
+        mailbox_bytes=mailbox_bytes,
+        seconds=seconds,
+        messages_per_second=params.messages / seconds,
+        peak_rss=get_peak_rss(),
+        bytes_written=sum(
+            get_size(path)
+            for path in dict(get_mail.outs).values()
+            if isinstance(path, Path)
+        ),
+    )
+
+
+def get_size(path: Path) -> int:
+    """Get the size of a file, or the total size of files in a directory."""
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size if path.exists() else 0
+
+
+def get_peak_rss() -> float | None:
+    """Get peak resident set size in MiB of this process.
+
+    Children are not measured, since their peak includes any process this one has
+    ever waited on, not just workers getting mail. Returns `None` on platforms without
+    {mod}`resource`, such as Windows.
+    """
+    try:
+        from resource import RUSAGE_SELF, getrusage  # noqa: PLC0415
+    except ImportError:
+        return None
+    peak = getrusage(RUSAGE_SELF).ru_maxrss
+    # ? Reported in bytes on macOS and in kibibytes elsewhere
+    return peak / (MIB if platform == "darwin" else 2**10)
+
+
+if __name__ == "__main__":
+    invoke(Bench)
@@ -8,9 +8,11 @@ from cappa.base import command
 from cappa.subcommand import Subcommands
 from pipeline_helper.sync_dvc import SyncDvc
 
+from gjob_pipeline.bench import Bench
 from gjob_pipeline.stages.convert import Convert
 from gjob_pipeline.stages.example import Example
 from gjob_pipeline.stages.get_mail import GetMail
+from gjob_pipeline.store import Store
 
 
 @dataclass
@@ -24,4 +26,4 @@ class Stage:
 class Pipeline:
     """Run the research data pipeline."""
 
-    commands: Subcommands[SyncDvc | Stage]
+    commands: Subcommands[SyncDvc | Stage | Bench | Store]
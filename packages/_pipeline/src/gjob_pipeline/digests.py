@@ -0,0 +1,53 @@
+"""Persistent index of digests of messages already converted."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from hashlib import blake2b
+
+from gjob_pipeline.mail.index import SqliteIndex
+from gjob_pipeline.models import Message
+
+VERSION = 1
+"""Version of alert and job parsing. Bump it to parse indexed messages again."""
+
+
+class DigestIndex(SqliteIndex):
+    """Index of the digests of messages already converted, backed by SQLite.
+
+    Indexes written with another version of parsing are cleared.
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS messages (digest TEXT PRIMARY KEY) WITHOUT ROWID",
+    )
+    tables = ("messages",)
+    version = VERSION
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM messages").fetchone()[0]
+
+    def get(self) -> set[str]:
+        """Get all digests in the index."""
+        return {
+            digest for (digest,) in self.connection.execute("SELECT * FROM messages")
+        }
+
+    def add(self, digests: Iterable[str]):
+        """Add digests to the index."""
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO messages (digest) VALUES (?)",
+            ((digest,) for digest in digests),
+        )
+
+
+def get_digest(message: Message) -> str:
+    """Get the digest of a message."""
+    return blake2b(
+        "\0".join([
+            message.subject,
+            message.received.isoformat(),
+            message.body,
+        ]).encode(),
+        digest_size=16,
+    ).hexdigest()
@@ -0,0 +1,145 @@
+"""Store of parsed jobs, indexed for fast filtered counts and lookups."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any, Literal
+
+from pandas import DataFrame
+
+from gjob_pipeline.mail.index import SqliteIndex
+
+Column = Literal["query", "state_or_province", "city", "company", "source"]
+"""Columns that jobs can be filtered and counted by."""
+COLUMNS = (
+    "query",
+    "country",
+    "state_or_province",
+    "city",
+    "company",
+    "title",
+    "location",
+    "posted",
+    "source",
+    "full_time",
+    "logo",
+)
+"""Columns of stored jobs."""
+INDEXED = ("query", "state_or_province", "city", "company", "source", "posted")
+"""Columns of stored jobs with an index."""
+
+
+@dataclass(frozen=True)
+class Where:
+    """Filter on stored jobs. Unset fields match all jobs."""
+
+    query: str | None = None
+    """Search query."""
+    state_or_province: str | None = None
+    """State or province."""
+    city: str | None = None
+    """City."""
+    company: str | None = None
+    """Company."""
+    source: str | None = None
+    """Site the job was posted on."""
+    since: date | None = None
+    """Earliest date posted."""
+    until: date | None = None
+    """Latest date posted."""
+
+    def get_clause(self) -> tuple[str, list[str]]:
+        """Get the `WHERE` clause of the filter and its parameters."""
+        conditions: list[str] = []
+        parameters: list[str] = []
+        for name, value in asdict(self).items():
+            if value is None:
+                continue
+            conditions.append(
+                "posted >= ?"
+                if name == "since"
+                else "posted <= ?"
+                if name == "until"
+                else f"{name} = ?"
+            )
+            parameters.append(value.isoformat() if isinstance(value, date) else value)
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
+
+
+class JobStore(SqliteIndex):
+    """Store of parsed jobs, backed by SQLite with an index on each filtered column."""
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS jobs ("
+        "query TEXT NOT NULL, country TEXT NOT NULL, state_or_province TEXT, city TEXT, "
+        "company TEXT NOT NULL, title TEXT NOT NULL, location TEXT NOT NULL, "
+        "posted TEXT NOT NULL, source TEXT NOT NULL, full_time INTEGER NOT NULL, "
+        "logo TEXT NOT NULL)",
+        *(f"CREATE INDEX IF NOT EXISTS jobs_{c} ON jobs ({c})" for c in INDEXED),
+    )
+    tables = ("jobs",)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM jobs").fetchone()[0]
+
+    def write(self, reqs: DataFrame):
+        """Replace stored jobs with located job requisitions.
+
+        See {func}`~gjob_pipeline.reqs.locate`.
+        """
+        rows = reqs.assign(
+            posted=reqs["posted"].dt.strftime("%Y-%m-%d"),
+            full_time=reqs["full_time"].astype(int),
+        )[list(COLUMNS)].astype(object)
+        self.connection.execute("DELETE FROM jobs")
+        self.connection.executemany(
+            f"INSERT INTO jobs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",  # noqa: S608
+            rows.where(rows.notna(), None).itertuples(index=False, name=None),
+        )
+        # ? Statistics let the query planner pick the most selective index
+        self.connection.execute("ANALYZE")
+        self.connection.commit()
+
+    def count(self, where: Where | None = None) -> int:
+        """Count jobs matching a filter."""
+        clause, parameters = (where or Where()).get_clause()
+        return self.connection.execute(
+            f"SELECT count(*) FROM jobs {clause}",  # noqa: S608
+            parameters,
+        ).fetchone()[0]
+
+    def count_by(
+        self, column: Column, where: Where | None = None
+    ) -> dict[str | None, int]:
+        """Count jobs matching a filter by the values of a column, most common first."""
+        clause, parameters = (where or Where()).get_clause()
+        return dict(
+            self.connection.execute(
+                f"SELECT {column}, count(*) AS n FROM jobs {clause} GROUP BY {column} ORDER BY n DESC, {column}",  # noqa: S608
+                parameters,
+            )
+        )
+
+    def find(self, where: Where | None = None, limit: int = -1) -> list[dict[str, Any]]:
+        """Find jobs matching a filter, in the order they were written.
+
+        Parameters
+        ----------
+        where
+            Filter.
+        limit
+            Maximum number of jobs to find, or all of them if negative.
+        """
+        clause, parameters = (where or Where()).get_clause()
+        return [
+            {
+                **dict(zip(COLUMNS, row, strict=True)),
+                "posted": date.fromisoformat(row[COLUMNS.index("posted")]),
+                "full_time": bool(row[COLUMNS.index("full_time")]),
+            }
+            for row in self.connection.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM jobs {clause} ORDER BY rowid LIMIT ?",  # noqa: S608
+                [*parameters, limit],
+            )
+        ]
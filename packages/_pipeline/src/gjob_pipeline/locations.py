@@ -0,0 +1,117 @@
+"""Normalization of job locations into state or province and city.
+
+Jobs share a few thousand distinct locations, so each distinct location is parsed once,
+and parsed locations are memoized in a table persisted across runs.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import astuple, dataclass, fields
+
+from pandas import DataFrame, Series
+
+from gjob_pipeline.mail.index import SqliteIndex
+
+VERSION = 1
+"""Version of location parsing rules. Memoized locations of other versions are dropped."""
+LOCATIONS = {
+    f"{address},  {newline}NY, United States": "New York, NY, United States"
+    for address in (
+        "The DE Shaw Group, Two Manhattan West, 375 9th Ave 52nd Floor, New York",
+        "IBM Thomas J. Watson Research Center, 1101 Kitchawan Rd, Yorktown Heights",
+    )
+    for newline in ("\r\n", "\n")
+}
+"""Job locations given as street addresses, and the locations they are in."""
+STATES_OR_PROVINCES = {"Quebec": "QB"}
+"""States or provinces spelled out in job locations, and their abbreviations."""
+SEPARATOR = ", "
+"""Separator between parts of job locations."""
+
+
+@dataclass(frozen=True, slots=True)
+class Location:
+    """Normalized job location."""
+
+    location: str
+    """Location, with street addresses replaced by the locations they are in."""
+    state_or_province: str | None
+    """State or province, if the location is at least that specific."""
+    city: str | None
+    """City, if the location is that specific."""
+
+
+LOCATION_FIELDS = tuple(f.name for f in fields(Location))
+"""Fields of normalized job locations."""
+
+
+class LocationCache(SqliteIndex):
+    """Normalized job locations memoized by the locations they were parsed from."""
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS locations (raw TEXT PRIMARY KEY, location TEXT NOT"
+        " NULL, state_or_province TEXT, city TEXT) WITHOUT ROWID",
+    )
+    tables = ("locations",)
+    version = VERSION
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM locations").fetchone()[0]
+
+    def get(self) -> dict[str, Location]:
+        """Get all memoized locations, keyed by the locations they were parsed from."""
+        return {
+            raw: Location(*values)
+            for raw, *values in self.connection.execute("SELECT * FROM locations")
+        }
+
+    def add(self, locations: Mapping[str, Location]):
+        """Memoize locations, keyed by the locations they were parsed from."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO locations VALUES (?, ?, ?, ?)",
+            ((raw, *astuple(location)) for raw, location in locations.items()),
+        )
+
+
+def normalize(locations: Series, cache: LocationCache | None = None) -> DataFrame:
+    """Normalize job locations, parsing each distinct location once.
+
+    Normalized locations have the same index as `locations`.
+
+    Parameters
+    ----------
+    locations
+        Job locations.
+    cache
+        Memoized locations. Distinct locations not yet in it are parsed and added.
+    """
+    codes, uniques = locations.factorize()
+    memo = cache.get() if cache is not None else {}
+    parsed = {raw: memo.get(raw) or parse_location(raw) for raw in uniques}
+    if cache is not None:
+        cache.add({raw: parsed[raw] for raw in uniques if raw not in memo})
+    return (
+        DataFrame(
+            [astuple(parsed[raw]) for raw in uniques],
+            columns=list(LOCATION_FIELDS),
+            dtype=object,
+        )
+        .take(codes)
+        .set_axis(locations.index)
+    )
+
+
+def parse_location(raw: str) -> Location:
+    """Parse a job location, `<city>, <state or province>, <country>` or less specific."""
+    location = LOCATIONS.get(raw, raw)
+    parts = location.split(SEPARATOR)
+    commas = location.count(",")
+    state_or_province = parts[-2] if commas > 0 and len(parts) > 1 else None
+    return Location(
+        location=location,
+        state_or_province=STATES_OR_PROVINCES.get(state_or_province, state_or_province)
+        if state_or_province is not None
+        else None,
+        city=parts[0] if commas > 1 else None,
+    )
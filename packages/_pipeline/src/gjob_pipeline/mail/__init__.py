@@ -0,0 +1,169 @@
+"""Mail sources."""
+
+from binascii import Error, a2b_base64, a2b_qp
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from email.message import EmailMessage
+from email.parser import BytesHeaderParser
+from email.policy import default
+from email.utils import parseaddr, parsedate_to_datetime
+from hashlib import blake2b
+from mmap import mmap
+from re import IGNORECASE, MULTILINE, compile, escape, search  # noqa: A004
+
+from gjob_pipeline.models import RawMessage
+
+header_parser = BytesHeaderParser(policy=default)
+"""Message header parser."""
+HEAD_ENDS = (b"\n\n", b"\n\r\n")
+"""Empty lines ending the headers of a message."""
+MESSAGE_ID = compile(rb"^Message-ID:\s*(<[^>\r\n]+>)", IGNORECASE | MULTILINE)
+"""`Message-ID` header."""
+
+
+@dataclass(frozen=True)
+class Prefilter:
+    """Filter messages by their headers alone, before parsing their bodies."""
+
+    sender: str = ""
+    """Address in `From` of messages to keep, ignoring case, or any sender if empty."""
+    subjects: tuple[str, ...] = ()
+    """Patterns at least one of which subjects must match, if any are given."""
+
+    def __call__(self, head: bytes) -> bool:
+        """Check whether the headers of a message pass the filter."""
+        if self.sender and self.sender.casefold().encode() not in head.lower():
+            return False
+        if not self.sender and not self.subjects:
+            return True
+        headers = header_parser.parsebytes(head)
+        if self.sender and (
+            parseaddr(str(headers["from"] or ""))[1].casefold()
+            != self.sender.casefold()
+        ):
+            return False
+        subject = str(headers["subject"] or "")
+        return not self.subjects or any(search(p, subject) for p in self.subjects)
+
+
+def get_head_end(data: bytes | mmap, start: int = 0, stop: int | None = None) -> int:
+    """Get the offset just past the empty line ending the headers of a message."""
+    stop = len(data) if stop is None else stop
+    for end in HEAD_ENDS:
+        if data[start : start + len(end) - 1] == end[1:]:
+            return start + len(end) - 1
+    return min(
+        (
+            index + len(end)
+            for end in HEAD_ENDS
+            if (index := data.find(end, start, stop)) >= 0
+        ),
+        default=stop,
+    )
+
+
+def get_key(message: bytes) -> str:
+    """Get the key of a message, its `Message-ID` or a digest if it has none."""
+    if match := MESSAGE_ID.search(message, 0, get_head_end(message)):
+        return match[1].decode("ascii", errors="replace")
+    return blake2b(message, digest_size=16).hexdigest()
+
+
+def get_raw_message(data: bytes) -> RawMessage | None:
+    """Get a raw message from the bytes of a single RFC 5322 message.
+
+    Only the headers and the part kept as the body are parsed. Messages without a valid
+    `Date` are skipped, returning `None`.
+    """
+    end = get_head_end(data)
+    headers = get_headers(data[:end])
+    if (date := get_date(headers)) is None:
+        return None
+    return RawMessage.model_validate({
+        "from": str(headers["from"] or ""),
+        "subject": str(headers["subject"] or ""),
+        "date": date,
+        "body": get_body(headers, data[end:]),
+    })
+
+
+def get_headers(head: bytes) -> EmailMessage:
+    """Get the headers of a message or message part."""
+    return header_parser.parsebytes(head)  # pyright: ignore[reportReturnType]
+
+
+def get_date(headers: EmailMessage) -> datetime | None:
+    """Get the date a message was sent, or `None` if its `Date` is missing or invalid."""
+    if (date := headers["date"]) is None:
+        return None
+    try:
+        return parsedate_to_datetime(str(date))
+    except ValueError:
+        return None
+
+
+def get_body(headers: EmailMessage, body: bytes) -> str:
+    """Get the first plain text part of a message, or its only part.
+
+    Other parts, such as HTML alternatives and inline images, are skipped without
+    being parsed or decoded.
+    """
+    part = (
+        (headers, body)
+        if headers.get_content_maintype() != "multipart"
+        else find_plain(headers, body)
+    )
+    if part is None:
+        return ""
+    headers, body = part
+    data = decode(headers, body)
+    try:
+        return data.decode(headers.get_content_charset() or "utf-8", errors="replace")
+    except LookupError:
+        # ? Charsets unknown to Python, such as `unknown-8bit`, are common in real mail
+        return data.decode("utf-8", errors="replace")
+
+
+def find_plain(headers: EmailMessage, body: bytes) -> tuple[EmailMessage, bytes] | None:
+    """Find the headers and body of the first plain text part, depth-first."""
+    if headers.get_content_maintype() != "multipart":
+        return (headers, body) if headers.get_content_type() == "text/plain" else None
+    if not (boundary := headers.get_boundary()):
+        return None
+    for part in iter_parts(body, boundary):
+        end = get_head_end(part)
+        if found := find_plain(get_headers(part[:end]), part[end:]):
+            return found
+    return None
+
+
+def iter_parts(body: bytes, boundary: str) -> Iterator[bytes]:
+    """Iterate over the parts of a multipart body, without parsing them."""
+    start = None
+    for match in compile(
+        rb"^--" + escape(boundary.encode()) + rb"(--)?[ \t]*(?:\r?\n|$)", MULTILINE
+    ).finditer(body):
+        if start is not None:
+            stop = match.start()
+            for ending in (b"\r\n", b"\n"):
+                if body.endswith(ending, start, stop):
+                    stop -= len(ending)
+                    break
+            yield body[start:stop]
+        if match[1]:
+            return
+        start = match.end()
+
+
+def decode(headers: EmailMessage, body: bytes) -> bytes:
+    """Decode a part body from its content transfer encoding."""
+    encoding = str(headers.get("content-transfer-encoding", "")).strip().lower()
+    if encoding == "base64":
+        try:
+            return a2b_base64(body)
+        except Error:
+            return b""
+    if encoding == "quoted-printable":
+        return a2b_qp(body)
+    return body
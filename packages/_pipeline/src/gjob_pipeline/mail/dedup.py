@@ -0,0 +1,33 @@
+"""Persistent index of ingested messages for deduplication."""
+
+from __future__ import annotations
+
+from gjob_pipeline.mail.index import SqliteIndex
+
+
+class DedupIndex(SqliteIndex):
+    """Index of the keys of messages already ingested, backed by SQLite.
+
+    Keys are `Message-ID` headers or, for messages without one, message digests. See
+    {func}`~gjob_pipeline.mail.get_key`.
+    """
+
+    schema = (
+        "CREATE TABLE IF NOT EXISTS messages (key TEXT PRIMARY KEY) WITHOUT ROWID",
+    )
+    tables = ("messages",)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(
+            self.connection.execute(
+                "SELECT 1 FROM messages WHERE key = ?", (key,)
+            ).fetchone()
+        )
+
+    def add(self, key: str) -> bool:
+        """Add a key to the index, returning whether it was not already present."""
+        return bool(
+            self.connection.execute(
+                "INSERT OR IGNORE INTO messages (key) VALUES (?)", (key,)
+            ).rowcount
+        )
@@ -0,0 +1,174 @@
+"""Persistent sidecar indices of message headers for random access into mailboxes."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parseaddr
+from pathlib import Path
+
+from gjob_pipeline.mail import get_date, get_head_end, get_headers, get_raw_message
+from gjob_pipeline.mail.index import SqliteIndex
+from gjob_pipeline.mail.mbox import read_message
+from gjob_pipeline.models import RawMessage
+
+SUFFIX = ".sqlite"
+"""Suffix of header index files, appended to mailbox names."""
+
+
+@dataclass(frozen=True)
+class Entry:
+    """Headers of a message and its location in a mailbox."""
+
+    offset: int
+    """Offset of the escaped message contents in the mailbox."""
+    length: int
+    """Length of the escaped message contents in the mailbox."""
+    date: datetime
+    """Date the message was sent, in UTC."""
+    sender: str
+    """Address of the sender, case-folded."""
+    subject: str
+    """Subject."""
+    message_id: str
+    """`Message-ID` header, or empty if it has none."""
+
+    @classmethod
+    def from_message(cls, offset: int, length: int, message: bytes) -> Entry | None:
+        """Get the entry for the bytes of a message at an offset into a mailbox.
+
+        Messages without a valid `Date` are skipped, returning `None`.
+        """
+        headers = get_headers(message[: get_head_end(message)])
+        if (date := get_date(headers)) is None:
+            return None
+        return cls(
+            offset=offset,
+            length=length,
+            date=to_utc(date),
+            sender=parseaddr(str(headers["from"] or ""))[1].casefold(),
+            subject=str(headers["subject"] or ""),
+            message_id=str(headers["message-id"] or "").strip(),
+        )
+
+
+@dataclass(frozen=True)
+class Window:
+    """Range of dates that messages were sent in."""
+
+    since: datetime | None = None
+    """Earliest date, inclusive, or unbounded if `None`."""
+    until: datetime | None = None
+    """Latest date, exclusive, or unbounded if `None`."""
+
+    def __contains__(self, date: datetime) -> bool:
+        date = to_utc(date)
+        return (self.since is None or date >= to_utc(self.since)) and (
+            self.until is None or date < to_utc(self.until)
+        )
+
+
+class HeaderIndex(SqliteIndex):
+    """Sidecar index of the headers of messages in a mailbox, backed by SQLite."""
+
+    schema = (
+        """
+        CREATE TABLE IF NOT EXISTS headers (
+            offset INTEGER PRIMARY KEY,
+            length INTEGER NOT NULL,
+            date INTEGER NOT NULL,
+            sender TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            message_id TEXT NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS headers_date ON headers (date)",
+        "CREATE INDEX IF NOT EXISTS headers_sender ON headers (sender)",
+        "CREATE INDEX IF NOT EXISTS headers_message_id ON headers (message_id)",
+    )
+    tables = ("headers",)
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM headers").fetchone()[0]
+
+    def add(self, entries: Iterable[Entry]):
+        """Add entries to the index, replacing any at the same offsets."""
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    e.offset,
+                    e.length,
+                    int(e.date.timestamp()),
+                    e.sender,
+                    e.subject,
+                    e.message_id,
+                )
+                for e in entries
+            ),
+        )
+
+    def get(self, offset: int) -> Entry | None:
+        """Get the entry at an offset, if there is one."""
+        return next(self.select("WHERE offset = ?", (offset,)), None)
+
+    def filter(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        sender: str = "",
+        subject: str = "",
+        message_id: str = "",
+    ) -> list[Entry]:
+        """Filter entries by their headers, in mailbox order.
+
+        Parameters
+        ----------
+        since
+            Earliest date, inclusive.
+        until
+            Latest date, exclusive.
+        sender
+            Sender address, matched case-insensitively.
+        subject
+            Text the subject must contain.
+        message_id
+            `Message-ID` header.
+        """
+        conditions: dict[str, int | str] = {}
+        if since:
+            conditions["date >= ?"] = int(to_utc(since).timestamp())
+        if until:
+            conditions["date < ?"] = int(to_utc(until).timestamp())
+        if sender:
+            conditions["sender = ?"] = sender.casefold()
+        if subject:
+            conditions["instr(subject, ?) > 0"] = subject
+        if message_id:
+            conditions["message_id = ?"] = message_id
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return list(self.select(f"{where} ORDER BY offset", conditions.values()))
+
+    def select(self, clauses: str, values: Iterable[int | str] = ()) -> Iterator[Entry]:
+        """Select entries with clauses following the `FROM` clause."""
+        for offset, length, date, *headers in self.connection.execute(
+            f"SELECT * FROM headers {clauses}",  # noqa: S608
+            tuple(values),
+        ):
+            yield Entry(offset, length, datetime.fromtimestamp(date, UTC), *headers)
+
+
+def to_utc(date: datetime) -> datetime:
+    """Convert a date to UTC, taking dates without a time zone to be in UTC."""
+    return date.astimezone(UTC) if date.tzinfo else date.replace(tzinfo=UTC)
+
+
+def get_index_path(directory: Path, mbox: Path) -> Path:
+    """Get the path of the header index of a mailbox in a directory of indices."""
+    return directory / f"{mbox.name}{SUFFIX}"
+
+
+def fetch(mbox: Path, entry: Entry) -> RawMessage | None:
+    """Fetch the message at an entry of a mailbox header index, without a rescan."""
+    return get_raw_message(read_message(mbox, entry.offset, entry.length))
@@ -0,0 +1,62 @@
+"""Persistent indices backed by SQLite."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from sqlite3 import Connection, connect
+from types import TracebackType
+from typing import ClassVar, Self
+
+
+class SqliteIndex:
+    """Index backed by SQLite, committed on exit unless an exception was raised.
+
+    Indices written with another version are cleared when opened for writing.
+    """
+
+    schema: ClassVar[tuple[str, ...]] = ()
+    """Statements creating tables and indices if they don't exist."""
+    tables: ClassVar[tuple[str, ...]] = ()
+    """Tables emptied when the index is cleared."""
+    version: ClassVar[int] = 0
+    """Version of the contents of the index, stored as its `user_version`."""
+
+    def __init__(self, path: Path, readonly: bool = False):
+        self.path = path
+        self.connection: Connection = (
+            connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+            if readonly
+            else connect(path)
+        )
+        if not readonly:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            for statement in self.schema:
+                self.connection.execute(statement)
+            if (
+                self.connection.execute("PRAGMA user_version").fetchone()[0]
+                != self.version
+            ):
+                self.clear()
+                self.connection.execute(f"PRAGMA user_version = {self.version}")
+            self.connection.commit()
+
+    def clear(self):
+        """Remove all rows from the tables of the index."""
+        for table in self.tables:
+            self.connection.execute(f"DELETE FROM {table}")  # noqa: S608
+        self.connection.commit()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ):
+        if exc_type is None:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+        self.connection.close()
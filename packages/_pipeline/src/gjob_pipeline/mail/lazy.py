@@ -0,0 +1,66 @@
+"""Messages with bodies loaded from their mailbox on access."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Literal
+
+from gjob_pipeline.mail import get_body, get_date, get_head_end, get_headers
+from gjob_pipeline.mail.mbox import read_message
+from gjob_pipeline.models import Message
+
+
+@dataclass(frozen=True, slots=True)
+class LazyMessage:
+    """Message headers with a reference to the message in a mailbox.
+
+    The body is read from the mailbox and extracted each time it is accessed, so only
+    headers are held in memory. Dumps to the same shape as {class}`Message`.
+    """
+
+    subject: str = field(compare=False)
+    """Subject."""
+    received: datetime = field(compare=False)
+    """Date the message was sent."""
+    mbox: Path
+    """Uncompressed mailbox."""
+    offset: int
+    """Offset of the escaped message contents in the mailbox."""
+    length: int
+    """Length of the escaped message contents in the mailbox."""
+
+    @classmethod
+    def from_message(
+        cls, mbox: Path, offset: int, length: int, message: bytes
+    ) -> LazyMessage | None:
+        """Get a lazy message from the bytes of a message at an offset into a mailbox.
+
+        Messages without a valid `Date` are skipped, returning `None`.
+        """
+        headers = get_headers(message[: get_head_end(message)])
+        if (received := get_date(headers)) is None:
+            return None
+        return cls(
+            subject=str(headers["subject"] or ""),
+            received=received,
+            mbox=mbox,
+            offset=offset,
+            length=length,
+        )
+
+    @property
+    def body(self) -> str:
+        """Body, read from the mailbox."""
+        message = read_message(self.mbox, self.offset, self.length)
+        end = get_head_end(message)
+        return get_body(get_headers(message[:end]), message[end:])
+
+    def to_message(self) -> Message:
+        """Get the message with its body loaded."""
+        return Message(subject=self.subject, received=self.received, body=self.body)
+
+    def model_dump(self, mode: Literal["python", "json"] = "python") -> dict[str, Any]:
+        """Dump the message with its body loaded, as {class}`Message` dumps."""
+        return self.to_message().model_dump(mode=mode)
@@ -0,0 +1,92 @@
+"""Maildir and directory-of-messages reader."""
+
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from os import DirEntry, scandir
+from pathlib import Path
+
+from gjob_pipeline.mail import Prefilter, get_head_end
+
+MAILDIR_SUBDIRS = ("cur", "new")
+"""Maildir subdirectories holding delivered messages."""
+SUFFIX = ".eml"
+"""Suffix of message files in directories other than Maildirs."""
+
+
+@dataclass(frozen=True)
+class Batch:
+    """Batch of files each holding a single message, from a message directory."""
+
+    directory: Path
+    """Message directory."""
+    files: tuple[Path, ...] = ()
+    """Message files."""
+
+
+def get_batches(directory: Path, size: int, workers: int = 8) -> list[Batch]:
+    """Split the message files in a directory into batches of `size` files."""
+    files = scan(directory, workers)
+    return [
+        Batch(directory, tuple(files[start : start + size]))
+        for start in range(0, len(files), size)
+    ]
+
+
+def scan(directory: Path, workers: int = 8) -> list[Path]:
+    """Find message files in a Maildir tree or directory of `.eml` files, in order.
+
+    Directories are scanned concurrently. Maildirs contribute files in their `cur` and
+    `new` subdirectories, and their Maildir++ folders are scanned in turn. Other
+    directories contribute `.eml` files, and their subdirectories are scanned in turn.
+    """
+    files: list[Path] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending: set[Future[tuple[list[Path], list[Path]]]] = {
+            executor.submit(scan_one, directory)
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, subdirectories = future.result()
+                files.extend(found)
+                pending.update(executor.submit(scan_one, d) for d in subdirectories)
+    return sorted(files)
+
+
+def scan_one(directory: Path) -> tuple[list[Path], list[Path]]:
+    """Get message files and subdirectories to scan in turn in a single directory."""
+    entries = list(scandir(directory))
+    if is_maildir(entries):
+        return [
+            Path(entry.path)
+            for subdir in MAILDIR_SUBDIRS
+            for entry in scandir(directory / subdir)
+            if entry.is_file() and not entry.name.startswith(".")
+        ], [
+            Path(entry.path)
+            for entry in entries
+            if entry.is_dir() and entry.name.startswith(".")
+        ]
+    return [
+        Path(entry.path)
+        for entry in entries
+        if entry.is_file() and entry.name.lower().endswith(SUFFIX)
+    ], [Path(entry.path) for entry in entries if entry.is_dir()]
+
+
+def is_maildir(entries: list[DirEntry[str]]) -> bool:
+    """Check whether directory entries are those of a Maildir."""
+    return set(MAILDIR_SUBDIRS) <= {e.name for e in entries if e.is_dir()}
+
+
+def iter_files(batch: Batch, prefilter: Prefilter | None = None) -> Iterator[bytes]:
+    """Iterate over the bytes of each message in a batch of message files.
+
+    Messages with headers not passing the prefilter are skipped.
+    """
+    for path in batch.files:
+        message = path.read_bytes()
+        if prefilter and not prefilter(message[: get_head_end(message)]):
+            continue
+        yield message
@@ -0,0 +1,175 @@
+"""Manifest of mailbox states for incremental parsing."""
+
+from __future__ import annotations
+
+from hashlib import sha256
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from gjob_pipeline.mail import Prefilter
+from gjob_pipeline.mail.headers import Window
+from gjob_pipeline.mail.mbox import (
+    CHUNK_SIZE,
+    SEPARATOR,
+    Shard,
+    is_compressed,
+    open_compressed,
+)
+
+HEAD_SIZE = 2**16
+"""Size of the head of a mailbox covered by its checksum."""
+
+
+class MailboxState(BaseModel):
+    """State of a mailbox when it was last parsed."""
+
+    size: int
+    """Size of the mailbox."""
+    head: str
+    """Checksum of the head of the mailbox."""
+    offset: int
+    """Offset just past the last parsed message."""
+    length: int | None = None
+    """Length of the decompressed stream, for compressed mailboxes."""
+
+
+class Manifest(BaseModel):
+    """Manifest of mailbox states."""
+
+    mailboxes: dict[str, MailboxState] = {}
+    """Mailbox states keyed by mailbox name."""
+    directories: list[str] = []
+    """Names of message directories."""
+    prefilter: Prefilter | None = None
+    """Prefilter that parsed messages passed."""
+    window: Window = Window()
+    """Range of dates that parsed messages were sent in."""
+
+    @classmethod
+    def read(cls, path: Path) -> Manifest:
+        """Read a manifest, or get an empty one if it doesn't exist."""
+        return (
+            cls.model_validate_json(path.read_text(encoding="utf-8"))
+            if path.exists()
+            else cls()
+        )
+
+    def write(self, path: Path):
+        """Write the manifest."""
+        path.write_text(encoding="utf-8", data=self.model_dump_json(indent=2) + "\n")
+
+    def get_shards(
+        self, mboxes: list[Path], prefilter: Prefilter, window: Window | None = None
+    ) -> list[Path | Shard] | None:
+        """Get shards of messages appended since mailboxes were last parsed.
+
+        Returns `None` if there is no record of prior runs with the same prefilter and
+        window, or if any mailbox was rewritten or removed since, in which case all
+        mailboxes must be parsed again. Message directories, and compressed mailboxes
+        with appended data such as another gzip member, are parsed again in full,
+        relying on the index to skip known messages.
+        """
+        if (
+            not (self.mailboxes or self.directories)
+            or self.prefilter != prefilter
+            or self.window != (window or Window())
+            or {*self.mailboxes, *self.directories} - {mbox.name for mbox in mboxes}
+        ):
+            return None
+        shards: list[Path | Shard] = []
+        for mbox in mboxes:
+            if mbox.is_dir():
+                shards.append(mbox)
+                continue
+            if not (state := self.mailboxes.get(mbox.name)):
+                shards.append(Shard(mbox))
+                continue
+            if not is_appended(mbox, state):
+                return None
+            if mbox.stat().st_size > state.offset:
+                shards.append(
+                    Shard(mbox)
+                    if is_compressed(mbox)
+                    else Shard(mbox, start=state.offset)
+                )
+        return shards
+
+    def get_indexed(self, mboxes: list[Path], prefilter: Prefilter) -> dict[Path, int]:
+        """Get offsets up to which mailboxes were indexed with the same prefilter.
+
+        Offsets into compressed mailboxes are offsets into their decompressed streams,
+        like offsets in header indices. Mailboxes that were rewritten since, and
+        compressed mailboxes that changed at all or weren't measured, are left out.
+        """
+        if self.prefilter != prefilter:
+            return {}
+        return {
+            mbox: state.length if state.length is not None else state.offset
+            for mbox in mboxes
+            if (state := self.mailboxes.get(mbox.name))
+            and is_appended(mbox, state)
+            and not (
+                is_compressed(mbox)
+                and (mbox.stat().st_size != state.size or state.length is None)
+            )
+        }
+
+    def update(
+        self, mboxes: list[Path], prefilter: Prefilter, window: Window | None = None
+    ):
+        """Record the current state of fully-parsed mailboxes."""
+        self.mailboxes = {
+            mbox.name: get_state(mbox, self.mailboxes.get(mbox.name))
+            for mbox in mboxes
+            if not mbox.is_dir()
+        }
+        self.directories = [mbox.name for mbox in mboxes if mbox.is_dir()]
+        self.prefilter = prefilter
+        self.window = window or Window()
+
+
+def get_state(mbox: Path, previous: MailboxState | None = None) -> MailboxState:
+    """Get the current state of a mailbox.
+
+    Compressed mailboxes are measured by decompressing them, unless unchanged since
+    their `previous` state.
+    """
+    size = mbox.stat().st_size
+    state = MailboxState(size=size, head=get_head(mbox, size), offset=size)
+    if is_compressed(mbox):
+        state.length = (
+            previous.length
+            if previous
+            and previous.length is not None
+            and (previous.size, previous.head) == (state.size, state.head)
+            else get_length(mbox)
+        )
+    return state
+
+
+def get_length(mbox: Path) -> int:
+    """Get the length of the decompressed stream of a compressed mailbox."""
+    length = 0
+    with open_compressed(mbox) as f:
+        while chunk := f.read(CHUNK_SIZE):
+            length += len(chunk)
+    return length
+
+
+def get_head(mbox: Path, size: int) -> str:
+    """Get checksum of the head of a mailbox that was `size` bytes long."""
+    with mbox.open("rb") as f:
+        return sha256(f.read(min(size, HEAD_SIZE))).hexdigest()
+
+
+def is_appended(mbox: Path, state: MailboxState) -> bool:
+    """Check whether a mailbox only had messages appended since its last state."""
+    size = mbox.stat().st_size
+    if size < state.offset or get_head(mbox, state.size) != state.head:
+        return False
+    if size == state.offset or is_compressed(mbox):
+        return True
+    with mbox.open("rb") as f:
+        f.seek(state.offset)
+        return f.read(len(SEPARATOR)) == SEPARATOR
@@ -0,0 +1,260 @@
+"""Mailbox reader, memory-mapped or stream-decompressed."""
+
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from gzip import GzipFile
+from io import BufferedReader
+from lzma import LZMAFile
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from re import MULTILINE, compile  # noqa: A004
+from typing import IO, TypeAlias
+
+from gjob_pipeline.mail import Prefilter, get_head_end, get_raw_message
+from gjob_pipeline.models import RawMessage
+
+SEPARATOR = b"From "
+"""Start of the line separating messages in a mailbox."""
+LINE_SEPARATOR = b"\n" + SEPARATOR
+"""Separator preceded by the end of the previous line."""
+ESCAPED_SEPARATOR = compile(rb"^>(>*From )", MULTILINE)
+"""Separator escaped in message contents, unescaped by removing one `>`."""
+
+EMPTY_LINES = (b"\n", b"\r\n")
+"""Empty lines."""
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".zst")
+"""Suffixes of compressed mailboxes."""
+CHUNK_SIZE = 2**20
+"""Size of chunks that decompressed streams are read in to skip or measure them."""
+
+Mapped: TypeAlias = mmap | bytes
+"""Mapped mailbox contents."""
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Byte range of a mailbox starting on a separator line."""
+
+    mbox: Path
+    """Mailbox."""
+    start: int = 0
+    """Offset of the first separator line in the shard."""
+    stop: int | None = None
+    """Offset just past the end of the shard, or the end of the mailbox if `None`."""
+
+
+@contextmanager
+def map_mbox(mbox: Path) -> Iterator[Mapped]:
+    """Map a mailbox into memory read-only."""
+    with mbox.open("rb") as f:
+        if not mbox.stat().st_size:
+            yield b""
+            return
+        with mmap(f.fileno(), 0, access=ACCESS_READ) as mapped:
+            yield mapped
+
+
+def is_compressed(mbox: Path) -> bool:
+    """Check whether a mailbox is compressed."""
+    return mbox.suffix in COMPRESSED_SUFFIXES
+
+
+@contextmanager
+def open_compressed(mbox: Path) -> Iterator[IO[bytes]]:
+    """Open a compressed mailbox, decompressing it as it is read."""
+    if mbox.suffix == ".gz":
+        with GzipFile(mbox, "rb") as f:
+            yield f
+        return
+    if mbox.suffix == ".xz":
+        with LZMAFile(mbox, "rb") as f:
+            yield f
+        return
+    try:
+        from zstandard import ZstdDecompressor  # noqa: PLC0415
+    except ImportError as err:
+        raise ImportError(
+            f"Reading '{mbox.name}' requires the 'zstd' extra of 'gjob-pipeline'."
+        ) from err
+    # ? Buffered, since the decompressing reader can't be iterated over by line
+    with mbox.open("rb") as raw:
+        reader = ZstdDecompressor().stream_reader(raw)
+        with BufferedReader(reader) as f:  # pyright: ignore[reportArgumentType]
+            yield f
+
+
+def get_shards(shard: Path | Shard, size: int) -> list[Shard]:
+    """Split a mailbox or shard into shards of roughly `size` bytes on separators.
+
+    Compressed mailboxes can't be split, and are returned as a single shard.
+    """
+    shard = shard if isinstance(shard, Shard) else Shard(shard)
+    if is_compressed(shard.mbox):
+        return [shard]
+    with map_mbox(shard.mbox) as mapped:
+        end = len(mapped) if shard.stop is None else shard.stop
+        starts = [shard.start]
+        while (starts[-1] + size < end) and (
+            (start := find_separator(mapped, starts[-1] + size, end)) < end
+        ):
+            starts.append(start)
+    return [
+        Shard(shard.mbox, start, stop)
+        for start, stop in zip(starts, [*starts[1:], shard.stop], strict=True)
+    ]
+
+
+def find_separator(mapped: Mapped, start: int, stop: int) -> int:
+    """Find the first separator line starting within a range, or the range stop."""
+    if not start and mapped[: len(SEPARATOR)] == SEPARATOR:
+        return start
+    index = mapped.find(LINE_SEPARATOR, max(start - 1, 0), stop)
+    return stop if index < 0 else index + 1
+
+
+def get_messages(
+    shard: Path | Shard, prefilter: Prefilter | None = None
+) -> Iterator[RawMessage]:
+    """Get messages from a mailbox or mailbox shard one at a time.
+
+    Messages without a valid `Date` are skipped.
+    """
+    for message in iter_messages(shard, prefilter):
+        if (raw := get_raw_message(message)) is not None:
+            yield raw
+
+
+def iter_messages(
+    shard: Path | Shard, prefilter: Prefilter | None = None
+) -> Iterator[bytes]:
+    """Iterate over the bytes of each message in a mailbox or mailbox shard."""
+    for _offset, _length, message in iter_located(shard, prefilter):
+        yield message
+
+
+def iter_located(
+    shard: Path | Shard, prefilter: Prefilter | None = None
+) -> Iterator[tuple[int, int, bytes]]:
+    """Iterate over the offset, length and bytes of each message in a mailbox or shard.
+
+    Offsets and lengths are those of the escaped message contents in the mailbox, or
+    in the decompressed stream of a compressed mailbox. Messages with headers not
+    passing the prefilter are skipped without being copied. Compressed mailboxes are
+    decompressed as they are read, without a temporary file.
+    """
+    shard = shard if isinstance(shard, Shard) else Shard(shard)
+    if is_compressed(shard.mbox):
+        with open_compressed(shard.mbox) as f:
+            yield from iter_stream(f, prefilter)
+        return
+    with map_mbox(shard.mbox) as mapped:
+        for start, stop in iter_spans(mapped, shard.start, shard.stop):
+            if prefilter and not prefilter(
+                mapped[start : get_head_end(mapped, start, stop)]
+            ):
+                continue
+            yield start, stop - start, unescape(mapped[start:stop])
+
+
+def iter_stream(
+    f: IO[bytes], prefilter: Prefilter | None = None
+) -> Iterator[tuple[int, int, bytes]]:
+    """Iterate over the offset, length and bytes of each message in a mailbox stream.
+
+    The stream is read line by line, and lines of messages with headers not passing
+    the prefilter are dropped as they are read.
+    """
+    lines: list[bytes] | None = None
+    head = True
+    start = offset = 0
+    for line in f:
+        offset += len(line)
+        if line.startswith(SEPARATOR):
+            if lines is not None and (
+                not head or not prefilter or prefilter(b"".join(lines))
+            ):
+                message = trim_lines(lines)
+                yield start, len(message), unescape(message)
+            lines = []
+            head = True
+            start = offset
+            continue
+        if lines is None:
+            continue
+        lines.append(line)
+        if head and line in EMPTY_LINES:
+            head = False
+            if prefilter and not prefilter(b"".join(lines)):
+                lines = None
+    if lines is not None and (not head or not prefilter or prefilter(b"".join(lines))):
+        message = trim_lines(lines)
+        yield start, len(message), unescape(message)
+
+
+def read_message(mbox: Path, offset: int, length: int) -> bytes:
+    """Read the bytes of the message at an offset into a mailbox, without parsing it.
+
+    Compressed mailboxes are decompressed up to the offset, but not past the message.
+    """
+    with open_compressed(mbox) if is_compressed(mbox) else mbox.open("rb") as f:
+        seek(f, offset)
+        return unescape(f.read(length))
+
+
+def read_messages(mbox: Path, spans: Iterable[tuple[int, int]]) -> Iterator[bytes]:
+    """Read the bytes of messages at offsets into a mailbox, in a single pass.
+
+    Spans of offsets and lengths must be in mailbox order, so that compressed mailboxes
+    are decompressed once rather than from the start for each message.
+    """
+    with open_compressed(mbox) if is_compressed(mbox) else mbox.open("rb") as f:
+        for offset, length in spans:
+            seek(f, offset)
+            yield unescape(f.read(length))
+
+
+def seek(f: IO[bytes], offset: int):
+    """Seek to an offset, reading forward to it in streams that can't seek."""
+    if f.seekable():
+        f.seek(offset)
+        return
+    while (remaining := offset - f.tell()) > 0:
+        if not f.read(min(remaining, CHUNK_SIZE)):
+            break
+
+
+def unescape(message: bytes) -> bytes:
+    """Unescape separators escaped in message contents."""
+    return ESCAPED_SEPARATOR.sub(rb"\1", message) if b">From " in message else message
+
+
+def trim_lines(lines: list[bytes]) -> bytes:
+    """Join message lines, trimming the empty line before the next separator."""
+    return b"".join(lines[:-1] if lines and lines[-1] in EMPTY_LINES else lines)
+
+
+def iter_spans(
+    mapped: Mapped, start: int = 0, stop: int | None = None
+) -> Iterator[tuple[int, int]]:
+    """Iterate over the spans of message contents between separator lines."""
+    stop = len(mapped) if stop is None else stop
+    separator = find_separator(mapped, start, stop)
+    while separator < stop:
+        contents = mapped.find(b"\n", separator, stop) + 1 or stop
+        following = find_separator(mapped, contents, stop)
+        yield contents, trim_span(mapped, contents, following)
+        separator = following
+
+
+def trim_span(mapped: Mapped, start: int, stop: int) -> int:
+    """Trim the empty line before the next separator from the end of a span."""
+    for ending in EMPTY_LINES:
+        trimmed = stop - len(ending)
+        if (
+            trimmed >= start
+            and mapped[trimmed:stop] == ending
+            and (trimmed == start or mapped[trimmed - 1 : trimmed] == b"\n")
+        ):
+            return trimmed
+    return stop
@@ -0,0 +1,139 @@
+"""Synthetic mailboxes mixing job alerts with noise, for scale tests."""
+
+from base64 import encodebytes
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from random import Random
+
+from gjob_pipeline.mail.mbox import SEPARATOR
+
+ALERT_SENDER = "Google <notify-noreply@google.com>"
+"""Sender of job alerts."""
+NOISE_SENDERS = (
+    "Newsletter <news@example.com>",
+    "Colleague <colleague@example.org>",
+    "Shop <orders@shop.example.net>",
+)
+"""Senders of noise mail."""
+QUERIES = ("Research software engineer", "Thermal", "Data engineer", "Embedded")
+"""Job alert search queries."""
+SEARCH_LOCATIONS = ("United States", "Washington, United States", "Canada")
+"""Job alert search locations."""
+LOCATIONS = (
+    "Seattle, WA, United States",
+    "Redmond, WA, United States",
+    "New York, NY, United States",
+    "Austin, TX, United States",
+    "Montreal, QC, Canada",
+    "United States",
+)
+"""Job locations."""
+COMPANIES = ("Acme", "Initech", "Globex", "Umbrella", "Hooli")
+"""Job companies."""
+SOURCES = ("LinkedIn", "Indeed", "Glassdoor", "ZipRecruiter")
+"""Job sources."""
+EPOCH = datetime(2024, 1, 1, tzinfo=UTC)
+"""Date of the first synthetic message."""
+LOGO = bytes(range(256)) * 4
+"""Inline image embedded in noise mail."""
+
+
+def write_mbox(
+    path: Path, count: int, alert_ratio: float = 0.1, seed: int = 0, start: int = 0
+) -> int:
+    """Write a mailbox of `count` synthetic messages, returning its size.
+
+    Messages are numbered from `start`, so mailboxes written with different starts
+    have distinct `Message-ID` headers.
+    """
+    rng = Random(seed)  # noqa: S311
+    with path.open("wb") as f:
+        for number in range(start, start + count):
+            f.write(get_message(rng, number, rng.random() < alert_ratio))
+    return path.stat().st_size
+
+
+def get_message(rng: Random, number: int, alert: bool) -> bytes:
+    """Get a synthetic message, with its separator line, escaped for a mailbox."""
+    date = EPOCH + timedelta(minutes=number)
+    query, search_location = rng.choice(QUERIES), rng.choice(SEARCH_LOCATIONS)
+    head = "\n".join([
+        f"From: {ALERT_SENDER if alert else rng.choice(NOISE_SENDERS)}",
+        f"Subject: {f'{query} in {search_location}' if alert else f'Update {number}'}",
+        f"Date: {date.strftime('%a, %d %b %Y %H:%M:%S +0000')}",
+        f"Message-ID: <{number}@synthetic.example.com>",
+        "MIME-Version: 1.0",
+    ])
+    body = (
+        get_alert(rng, query, search_location, date)
+        if alert
+        else get_noise(rng, number)
+    )
+    return b"".join([
+        SEPARATOR,
+        f"MAILER-DAEMON {date.strftime('%a %b %d %H:%M:%S %Y')}\n".encode(),
+        head.encode(),
+        b"\n",
+        body.replace(b"\nFrom ", b"\n>From "),
+        b"\n\n",
+    ])
+
+
+def get_alert(rng: Random, query: str, search_location: str, date: datetime) -> bytes:
+    """Get the body of a synthetic job alert, with its content headers."""
+    newline = "\n"
+    jobs = [
+        newline.join([
+            f"{company} logo{newline * 2}",
+            rng.choice(["Research Software Engineer", "Engineer II", "Scientist"]),
+            f"{company}{newline}",
+            f"{rng.choice(LOCATIONS)}{newline}",
+            f"via {rng.choice(SOURCES)}{newline}",
+            " ".join([
+                f"Time icon {(date - timedelta(days=rng.randrange(30))):%b %d}",
+                *(["Work icon Part-time"] if rng.random() < 0.1 else []),
+            ]),
+        ])
+        for company in rng.choices(COMPANIES, k=rng.randint(1, 6))
+    ]
+    footer = "".join(
+        f"{line}{newline * 5}"
+        for line in ["Manage alerts", "Unsubscribe", "Google LLC, Mountain View"]
+    )
+    text = "".join([
+        f'"{query}" in {search_location}{newline}',
+        f"{search_location}{newline}",
+        "".join(f"{job}{newline * 5}" for job in [*jobs, "See more jobs"]),
+        footer,
+    ])
+    return "\n".join([
+        "Content-Type: text/plain; charset=utf-8",
+        "Content-Transfer-Encoding: 8bit",
+        "",
+        text,
+    ]).encode()
+
+
+def get_noise(rng: Random, number: int) -> bytes:
+    """Get the body of a synthetic noise message, with its content headers.
+
+    Some noise is multipart, with HTML alternatives and inline images.
+    """
+    text = " ".join(rng.choices(["lorem", "ipsum", "dolor", "sit", "amet"], k=200))
+    if rng.random() < 0.5:
+        return "\n".join(["Content-Type: text/plain; charset=utf-8", "", text]).encode()
+    boundary = f"synthetic-{number}"
+    return b"\n".join([
+        f'Content-Type: multipart/related; boundary="{boundary}"'.encode(),
+        b"",
+        f"--{boundary}".encode(),
+        b"Content-Type: text/html; charset=utf-8",
+        b"",
+        f"<p>{text}</p>".encode(),
+        f"--{boundary}".encode(),
+        b"Content-Type: image/png",
+        b"Content-Transfer-Encoding: base64",
+        b"",
+        encodebytes(LOGO).rstrip(),
+        f"--{boundary}--".encode(),
+    ])
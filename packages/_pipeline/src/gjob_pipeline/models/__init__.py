@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from typing import Annotated as Ann
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -14,3 +14,21 @@ class Message(BaseModel):
 class RawMessage(Message):
     sender: Ann[str, Field(validation_alias="from", exclude=True)]
     received: Ann[datetime, Field(validation_alias="date")]
+
+
+class Alert(BaseModel):
+    query: str
+    search_location: str
+    received: datetime
+    jobs: list[str]
+    footer: str
+
+
+class Job(BaseModel):
+    company: str
+    location: str
+    title: str
+    posted: date
+    source: str
+    full_time: bool
+    logo: str
@@ -24,9 +24,16 @@ class Paths(PipelineHelperContextStore):
     }
     example: DataDir = Path("example")
     example_out: DataDir = Path("example_out")
+    jobs: DataFile = Path("jobs.sqlite")
+    locations: DataFile = Path("locations.sqlite")
     mail: DataFile = Path("mail.json")
+    mail_headers: DataDir = Path("mail_headers")
+    mail_imap: DataFile = Path("mail_imap.json")
+    mail_index: DataFile = Path("mail_index.sqlite")
+    mail_manifest: DataFile = Path("mail_manifest.json")
     mboxes: DataDir = Path("mboxes")
     reqs: DataFile = Path("reqs.json")
+    reqs_index: DataFile = Path("reqs_index.sqlite")
 
 
 paths = Paths()
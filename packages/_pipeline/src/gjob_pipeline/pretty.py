@@ -0,0 +1,142 @@
+"""Pretty JSON, formatted as Prettier formats it, written in-process.
+
+Objects and arrays are printed on one line if they fit within the print width, and
+broken with one item per line otherwise. Arrays of more than one object or array, each
+with more than one item, are always broken, as are their parents. Values are never
+moved to a new line after their keys.
+"""
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from itertools import chain
+from json import dumps
+from pathlib import Path
+from typing import Any
+
+from more_itertools import mark_ends
+
+WIDTH = 80
+"""Print width."""
+INDENT = "  "
+"""Indentation."""
+
+
+def dump(value: Any, path: Path):
+    """Write a value as pretty JSON, streaming it to the file."""
+    with path.open("w", encoding="utf-8") as f:
+        f.writelines(iter_pretty(value))
+
+
+def dump_records(records: Iterable[Mapping[str, Any]], path: Path):
+    """Write records as a pretty JSON array, streaming them one at a time.
+
+    Records are held only until the array is known not to fit on one line, so that
+    arrays of any number of records are printed as Prettier would.
+    """
+    records = iter(records)
+    head: list[Mapping[str, Any]] = []
+    remaining = WIDTH - 2
+    for record in records:
+        remaining = get_remaining(record, remaining - (2 if head else 0))
+        head.append(record)
+        if remaining < 0:
+            break
+    else:
+        dump(head, path)
+        return
+    with path.open("w", encoding="utf-8") as f:
+        f.write("[")
+        for first, last, record in mark_ends(chain(head, records)):
+            f.write(f"{'' if first else ','}\n{INDENT}")
+            f.writelines(iter_pretty(record, 1, len(INDENT), int(not last)))
+        f.write("\n]")
+
+
+def iter_pretty(
+    value: Any, level: int = 0, column: int = 0, trailing: int = 0
+) -> Iterator[str]:
+    """Iterate over chunks of a value as pretty JSON.
+
+    Parameters
+    ----------
+    value
+        Value to print.
+    level
+        Indentation level of the line the value starts on.
+    column
+        Column the value starts at.
+    trailing
+        Width of text that must fit on the line after the value.
+    """
+    if not isinstance(value, Mapping | list | tuple) or not value:
+        yield get_flat(value)
+        return
+    if get_remaining(value, WIDTH - column - trailing) >= 0:
+        yield get_flat(value)
+        return
+    indent = INDENT * (level + 1)
+    if isinstance(value, Mapping):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            key = f"{dumps(key)}: "
+            yield f"{',' if i else ''}\n{indent}{key}"
+            yield from iter_pretty(
+                item, level + 1, len(indent) + len(key), int(i < len(value) - 1)
+            )
+        yield f"\n{INDENT * level}}}"
+        return
+    yield "["
+    for i, item in enumerate(value):
+        yield f"{',' if i else ''}\n{indent}"
+        yield from iter_pretty(item, level + 1, len(indent), int(i < len(value) - 1))
+    yield f"\n{INDENT * level}]"
+
+
+def get_flat(value: Any) -> str:
+    """Get a value as JSON on one line."""
+    if isinstance(value, Mapping):
+        return (
+            f"{{ {', '.join(f'{dumps(k)}: {get_flat(v)}' for k, v in value.items())} }}"
+            if value
+            else "{}"
+        )
+    if isinstance(value, list | tuple):
+        return f"[{', '.join(get_flat(v) for v in value)}]"
+    return dumps(value)
+
+
+def get_remaining(value: Any, width: int) -> int:  # noqa: PLR0911
+    """Get width remaining after printing a value on one line, negative if it can't be.
+
+    Stops measuring once the value is known not to fit.
+    """
+    if width < 0:
+        return width
+    if isinstance(value, Mapping | list | tuple) and not value:
+        return width - 2
+    if isinstance(value, str):
+        return width - (len(value) + 2 if len(value) + 2 > width else len(dumps(value)))
+    if isinstance(value, Mapping):
+        width -= 4 + 2 * (len(value) - 1)
+        for key, item in value.items():
+            if (width := get_remaining(item, get_remaining(key, width) - 2)) < 0:
+                return width
+        return width
+    if isinstance(value, list | tuple):
+        width -= 2 + 2 * (len(value) - 1)
+        for item in value:
+            if (width := get_remaining(item, width)) < 0:
+                return width
+        return -1 if is_broken_array(value) else width
+    return width - len(dumps(value))
+
+
+def is_broken_array(value: Sequence[Any]) -> bool:
+    """Check whether an array is always broken.
+
+    Arrays of more than one object, or of more than one array, each with more than one
+    item, are always broken.
+    """
+    return len(value) > 1 and (
+        all(isinstance(v, Mapping) and len(v) > 1 for v in value)
+        or all(isinstance(v, list | tuple) and len(v) > 1 for v in value)
+    )
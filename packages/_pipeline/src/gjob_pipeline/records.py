@@ -0,0 +1,108 @@
+"""Low-overhead records of job alerts and jobs.
+
+Records are slotted dataclasses constructed without validation, and dump to the same
+shapes as the {class}`~gjob_pipeline.models.Alert` and {class}`~gjob_pipeline.models.Job`
+models that validate them in strict mode.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass, fields
+from datetime import date, datetime
+from typing import Any, Literal
+
+from gjob_pipeline.models import Alert, Job
+
+UTC_OFFSET = "+00:00"
+"""UTC offset in ISO 8601 dates."""
+
+
+@dataclass(slots=True)
+class AlertRecord:
+    """Job alert."""
+
+    query: str
+    """Search query."""
+    search_location: str
+    """Search location."""
+    received: datetime
+    """Date the alert was sent."""
+    jobs: list[str]
+    """Text of each job in the alert."""
+    footer: str
+    """Footer."""
+
+    def model_dump(self, mode: Literal["python", "json"] = "python") -> dict[str, Any]:
+        """Dump the alert as {class}`~gjob_pipeline.models.Alert` dumps."""
+        return {
+            "query": self.query,
+            "search_location": self.search_location,
+            "received": to_json(self.received) if mode == "json" else self.received,
+            "jobs": list(self.jobs),
+            "footer": self.footer,
+        }
+
+    def validate(self) -> Alert:
+        """Validate the alert strictly."""
+        return Alert.model_validate(self.model_dump(), strict=True)
+
+
+@dataclass(slots=True)
+class JobRecord:
+    """Job in a job alert."""
+
+    company: str
+    """Company."""
+    location: str
+    """Location."""
+    title: str
+    """Title."""
+    posted: date
+    """Date posted."""
+    source: str
+    """Site the job was posted on."""
+    full_time: bool
+    """Whether the job is full-time."""
+    logo: str
+    """Alternative text of the company logo."""
+
+    def model_dump(self, mode: Literal["python", "json"] = "python") -> dict[str, Any]:
+        """Dump the job as {class}`~gjob_pipeline.models.Job` dumps."""
+        return {
+            "company": self.company,
+            "location": self.location,
+            "title": self.title,
+            "posted": self.posted.isoformat() if mode == "json" else self.posted,
+            "source": self.source,
+            "full_time": self.full_time,
+            "logo": self.logo,
+        }
+
+    def validate(self) -> Job:
+        """Validate the job strictly."""
+        return Job.model_validate(self.model_dump(), strict=True)
+
+
+JOB_FIELDS = tuple(f.name for f in fields(JobRecord))
+"""Fields of jobs."""
+
+
+def to_json(value: datetime) -> str:
+    """Serialize a date as pydantic does, with `Z` for UTC offsets."""
+    serialized = value.isoformat()
+    return (
+        f"{serialized.removesuffix(UTC_OFFSET)}Z"
+        if serialized.endswith(UTC_OFFSET)
+        else serialized
+    )
+
+
+def get_columns(jobs: Iterable[JobRecord]) -> dict[str, list[Any]]:
+    """Get columns of job fields."""
+    columns: dict[str, list[Any]] = {name: [] for name in JOB_FIELDS}
+    appends = [columns[name].append for name in JOB_FIELDS]
+    for job in jobs:
+        for append, name in zip(appends, JOB_FIELDS, strict=True):
+            append(getattr(job, name))
+    return columns
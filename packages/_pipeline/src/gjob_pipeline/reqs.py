@@ -0,0 +1,332 @@
+"""Vectorized parsing of the jobs in alerts into a table of job requisitions."""
+
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+from json import loads
+from pathlib import Path
+from typing import Any
+
+from pandas import DataFrame, Series, concat, to_datetime
+
+from gjob_pipeline.alerts import (
+    POSTED_PREFIX,
+    Failure,
+    ParseError,
+    get_job,
+    parse_alerts,
+)
+from gjob_pipeline.digests import DigestIndex, get_digest
+from gjob_pipeline.locations import LocationCache, normalize
+from gjob_pipeline.models import Message
+from gjob_pipeline.pretty import dump
+from gjob_pipeline.records import JOB_FIELDS, AlertRecord, JobRecord, get_columns
+
+COLUMNS = ["query", "search_location", *JOB_FIELDS]
+"""Columns of job requisition tables."""
+LINES = {"logo": 0, "title": 3, "company": 4, "location": 6, "source": 8, "posted": 10}
+"""Lines holding each field of jobs with single-line fields."""
+EMPTY_LINES = (1, 2, 5, 7, 9)
+"""Empty lines of jobs with single-line fields."""
+POSTED = r"^(?P<posted>.+?)(?:\sWork icon (?P<full_time>.+))?$"
+"""Date posted and employment type in the line following the date posted prefix."""
+NEWLINES = ("\r\n", "\n")
+"""Newline styles."""
+DTYPES = {"posted": "datetime64[ns]", "full_time": bool}
+"""Types of job fields other than text."""
+
+
+def get_reqs(
+    alerts: Iterable[AlertRecord],
+    failures: list[Failure] | None = None,
+    strict: bool = False,
+) -> DataFrame:
+    """Parse the jobs in alerts into a table of job requisitions.
+
+    Jobs are collected into a single column and their fields extracted with vectorized
+    string operations, then dates posted are converted at once. Jobs with multi-line
+    fields, or all jobs in strict mode, are parsed individually instead. Rows are
+    grouped by query, then by search location, each in order of first appearance.
+
+    Parameters
+    ----------
+    alerts
+        Job alerts.
+    failures
+        If given, jobs that could not be parsed are appended to it and skipped.
+        Otherwise, the first of them raises.
+    strict
+        Parse each job individually, validating it with its model.
+    """
+    alerts = list(alerts)
+    counts = [len(alert.jobs) for alert in alerts]
+    texts = Series([job for alert in alerts for job in alert.jobs], dtype=object)
+    reqs = DataFrame({
+        "query": Series([a.query for a in alerts], dtype=object).repeat(counts),
+        "search_location": Series(
+            [a.search_location for a in alerts], dtype=object
+        ).repeat(counts),
+    }).reset_index(drop=True)
+    crlf = texts.str.contains("\r\n", regex=False)
+    fields = [
+        extract(texts[crlf if newline == "\r\n" else ~crlf], newline)
+        for newline in ([] if strict else NEWLINES)
+    ]
+    jobs: dict[int, JobRecord] = {}
+    parsed = concat(fields).index if fields else []
+    for row in texts.index.difference(parsed):
+        try:
+            jobs[row] = get_job(texts[row], strict)
+        except ParseError as err:
+            if failures is None:
+                raise
+            failures.append(Failure(texts[row], err))
+    if jobs:
+        fields.append(
+            DataFrame(
+                get_columns(jobs.values()), index=list(jobs), dtype=object
+            ).assign(posted=lambda df: to_datetime(df["posted"]))
+        )
+    if not fields:
+        fields.append(empty())
+    return group(reqs.join(concat(fields), how="inner").astype(DTYPES))
+
+
+def parse_reqs(
+    messages: Sequence[Message],
+    failures: list[Failure] | None = None,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    strict: bool = False,
+) -> DataFrame:
+    """Parse job alert messages into a table of job requisitions, in parallel.
+
+    Messages are split into chunks of `chunk_size` messages parsed across `workers`
+    processes. Tables and failures of chunks are merged in message order, so the result
+    is the same as parsing all messages at once.
+
+    Parameters
+    ----------
+    messages
+        Job alert messages.
+    failures
+        If given, alerts and jobs that could not be parsed are appended to it and
+        skipped. Otherwise, the first of them raises.
+    workers
+        Number of worker processes.
+    chunk_size
+        Number of messages in each chunk.
+    strict
+        Parse each job individually, validating alerts and jobs with their models.
+    """
+    if workers <= 1 or len(messages) <= chunk_size:
+        chunks = [parse_chunk(messages, failures is not None, strict)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(
+                executor.map(
+                    parse_chunk,
+                    (
+                        messages[start : start + chunk_size]
+                        for start in range(0, len(messages), chunk_size)
+                    ),
+                    repeat(failures is not None),
+                    repeat(strict),
+                )
+            )
+    if failures is not None:
+        failures.extend(
+            failure for _, chunk_failures in chunks for failure in chunk_failures
+        )
+    return group(concat([reqs for reqs, _ in chunks], ignore_index=True))
+
+
+def update_reqs(
+    messages: Sequence[Message],
+    path: Path,
+    index: DigestIndex,
+    failures: list[Failure] | None = None,
+    incremental: bool = True,
+    workers: int = 1,
+    chunk_size: int = 1000,
+    strict: bool = False,
+) -> DataFrame:
+    """Parse messages not yet converted, merging their jobs into existing ones.
+
+    Messages whose digests are in the index are skipped, and jobs parsed from the rest
+    are merged into job requisitions loaded from `path`, grouped by query, then search
+    location. If messages were only appended since the last run, rows are in the same
+    order as if all messages were parsed at once. Otherwise, queries and search
+    locations first seen in new messages come after existing ones. Job requisitions
+    are then written back to `path` and digests of the parsed messages added to the
+    index. If any indexed message is no longer among the messages, all messages are
+    parsed again.
+
+    Messages that could not be parsed as alerts aren't indexed, so they are parsed
+    again on the next run. Messages with only some jobs that could not be parsed are
+    indexed, since their other jobs were merged, and are parsed again once the index
+    version changes. See {data}`~gjob_pipeline.digests.VERSION`.
+
+    Parameters
+    ----------
+    messages
+        Job alert messages.
+    path
+        Job requisitions, nested by query, then search location.
+    index
+        Index of digests of messages already converted.
+    failures
+        If given, alerts and jobs that could not be parsed are appended to it and
+        skipped. Otherwise, the first of them raises.
+    incremental
+        Only parse messages not yet converted.
+    workers
+        Number of worker processes.
+    chunk_size
+        Number of messages in each chunk.
+    strict
+        Parse each job individually, validating alerts and jobs with their models.
+    """
+    digests = [get_digest(message) for message in messages]
+    indexed = index.get() if incremental and path.exists() else set()
+    if not indexed <= set(digests):
+        indexed = set()
+    if not indexed:
+        index.clear()
+    new = [(m, d) for m, d in zip(messages, digests, strict=True) if d not in indexed]
+    new_failures: list[Failure] = []
+    reqs = parse_reqs(
+        [m for m, _ in new],
+        new_failures if failures is not None else None,
+        workers=workers,
+        chunk_size=chunk_size,
+        strict=strict,
+    )
+    if indexed:
+        reqs = group(concat([load_reqs(path), reqs], ignore_index=True))
+    dump(dump_reqs(reqs), path)
+    unparsed = {f.text for f in new_failures if f.error.kind == "alert"}
+    index.add(d for m, d in new if m.body not in unparsed)
+    if failures is not None:
+        failures.extend(new_failures)
+    return reqs
+
+
+def parse_chunk(
+    messages: Sequence[Message], skip: bool, strict: bool = False
+) -> tuple[DataFrame, list[Failure]]:
+    """Parse a chunk of job alert messages, skipping failures if `skip` is set."""
+    failures: list[Failure] | None = [] if skip else None
+    reqs = get_reqs(parse_alerts(messages, failures, strict), failures, strict)
+    return reqs, failures or []
+
+
+def group(reqs: DataFrame) -> DataFrame:
+    """Group rows by query, then by search location, each in order of first appearance.
+
+    Rows keep their order within groups.
+    """
+    return (
+        reqs.assign(
+            query_order=reqs["query"].factorize()[0],
+            search_location_order=(
+                reqs["query"] + "\0" + reqs["search_location"]
+            ).factorize()[0],
+        )
+        .sort_values(["query_order", "search_location_order"], kind="stable")
+        .reset_index(drop=True)[COLUMNS]
+    )
+
+
+def extract(texts: Series, newline: str) -> DataFrame:
+    """Extract fields of jobs with single-line fields in a newline style.
+
+    Only the rows that have single-line fields and a valid date posted are returned.
+    """
+    lines = texts.str.split(newline, expand=True)
+    last = max(LINES.values())
+    if lines.shape[1] <= last:
+        return empty()
+    valid = (
+        lines[list(LINES.values())].notna().all(axis="columns")
+        & lines[list(LINES.values())].ne("").all(axis="columns")
+        & lines[list(EMPTY_LINES)].eq("").all(axis="columns")
+        & lines[last].str.startswith(POSTED_PREFIX, na=False)
+    )
+    if lines.shape[1] > last + 1:
+        valid &= lines[last + 1].isna()
+    lines = lines[valid]
+    posted = lines[LINES["posted"]].str.slice(len(POSTED_PREFIX)).str.extract(POSTED)
+    dates = to_datetime(
+        posted["posted"] + " " + str(datetime.now().year).zfill(4),
+        format="%b %d %Y",
+        errors="coerce",
+    )
+    valid = dates.notna()
+    return DataFrame({
+        "company": lines[LINES["company"]],
+        "location": lines[LINES["location"]],
+        "title": lines[LINES["title"]],
+        "posted": dates,
+        "source": lines[LINES["source"]].str.removeprefix("via").str.strip(),
+        "full_time": posted["full_time"].isna()
+        | posted["full_time"].str.casefold().eq("full-time"),
+        "logo": lines[LINES["logo"]],
+    })[valid]
+
+
+def empty() -> DataFrame:
+    """Get an empty table of job fields."""
+    return DataFrame(columns=JOB_FIELDS).astype(DTYPES)
+
+
+def locate(reqs: DataFrame, cache: LocationCache | None = None) -> DataFrame:
+    """Split job locations into state or province and city, renaming search location.
+
+    Search locations are countries. See {func}`~gjob_pipeline.locations.normalize`.
+
+    Parameters
+    ----------
+    reqs
+        Job requisitions.
+    cache
+        Memoized locations.
+    """
+    return (
+        reqs.rename(columns={"search_location": "country"})
+        .drop(columns="location")
+        .join(normalize(reqs["location"], cache))
+    )
+
+
+def dump_reqs(reqs: DataFrame) -> dict[str, dict[str, list[dict[str, Any]]]]:
+    """Dump job requisitions nested by query, then search location, as JSON values."""
+    fields = list(JOB_FIELDS)
+    records = reqs.assign(posted=reqs["posted"].dt.strftime("%Y-%m-%d"))
+    dumped: dict[str, dict[str, list[dict[str, Any]]]] = {}
+    for (query, search_location), rows in records.groupby(
+        ["query", "search_location"], sort=False
+    ):
+        dumped.setdefault(str(query), {})[str(search_location)] = [
+            dict(zip(fields, values, strict=True))
+            for values in zip(*(rows[f].tolist() for f in fields), strict=True)
+        ]
+    return dumped
+
+
+def load_reqs(path: Path) -> DataFrame:
+    """Load job requisitions dumped nested by query, then search location."""
+    dumped: dict[str, dict[str, list[dict[str, Any]]]] = loads(
+        path.read_text(encoding="utf-8")
+    )
+    return DataFrame(
+        [
+            {"query": query, "search_location": search_location, **job}
+            for query, jobs_for_query in dumped.items()
+            for search_location, jobs in jobs_for_query.items()
+            for job in jobs
+        ],
+        columns=COLUMNS,
+        dtype=object,
+    ).astype(DTYPES)
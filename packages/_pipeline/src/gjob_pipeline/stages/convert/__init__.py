@@ -4,22 +4,32 @@ from typing import Annotated as Ann
 from cappa.arg import Arg
 from cappa.base import command
 from pipeline_helper.models import stage
-from pipeline_helper.models.contexts import DirectoryPathSerPosix
+from pipeline_helper.models.contexts import DirectoryPathSerPosix, FilePathSerPosix
 from pipeline_helper.models.params import Params
 from pipeline_helper.models.path import DataFile, DocsFile
 from pydantic import Field
 
 from gjob_pipeline.models.paths import paths
+from gjob_pipeline.parser import PairedArg
 
 
 class Deps(stage.NbDeps):
     stage: DirectoryPathSerPosix = Path(__file__).parent
     nb: DocsFile = paths.notebooks[stage.stem]
     mail: DataFile = paths.mail
+    alerts: FilePathSerPosix = Path(__file__).parents[2] / "alerts.py"
+    records: FilePathSerPosix = Path(__file__).parents[2] / "records.py"
+    reqs: FilePathSerPosix = Path(__file__).parents[2] / "reqs.py"
+    digests: FilePathSerPosix = Path(__file__).parents[2] / "digests.py"
+    locations: FilePathSerPosix = Path(__file__).parents[2] / "locations.py"
+    jobs: FilePathSerPosix = Path(__file__).parents[2] / "jobs.py"
 
 
 class Outs(stage.Outs):
     reqs: DataFile = paths.reqs
+    reqs_index: DataFile = paths.reqs_index
+    jobs: DataFile = paths.jobs
+    locations: DataFile = paths.locations
 
 
 @command(default_long=True, invoke="gjob_pipeline.stages.convert.__main__.main")
@@ -28,3 +38,13 @@ class Convert(Params[Deps, Outs]):
 
     deps: Ann[Deps, Arg(hidden=True)] = Field(default_factory=Deps)
     outs: Ann[Outs, Arg(hidden=True)] = Field(default_factory=Outs)
+    incremental: Ann[bool, PairedArg("incremental")] = True
+    """Only parse messages not converted since the last run."""
+    workers: int = 1
+    """Number of worker processes parsing alerts in parallel."""
+    chunk_size: int = 1000
+    """Number of messages in chunks that alerts are split into across workers."""
+    strict: Ann[bool, PairedArg("strict")] = False
+    """Validate every alert and job with its model, for debugging."""
+    headless: Ann[bool, PairedArg("headless")] = False
+    """Only write outputs, skipping the notebook and its display and plotting."""
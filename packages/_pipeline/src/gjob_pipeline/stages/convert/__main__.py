@@ -1,11 +1,59 @@
-from pipeline_helper.notebook_namespaces import get_nb_ns
+from json import loads
 
+from pandas import DataFrame
+
+from gjob_pipeline import get_logger
+from gjob_pipeline.alerts import Failure
+from gjob_pipeline.digests import DigestIndex
+from gjob_pipeline.jobs import JobStore
+from gjob_pipeline.locations import LocationCache
+from gjob_pipeline.models import Message
 from gjob_pipeline.parser import invoke
+from gjob_pipeline.reqs import locate, update_reqs
 from gjob_pipeline.stages.convert import Convert as Params
 
 
 def main(params: Params):
-    get_nb_ns(nb=params.deps.nb.read_text(encoding="utf-8"), display_stdout=True)
+    if params.headless:
+        convert(params)
+        return
+    # ? Imported here so that headless runs never import notebook or plotting machinery
+    from pipeline_helper.notebook_namespaces import get_nb_ns  # noqa: PLC0415
+
+    get_nb_ns(
+        nb=params.deps.nb.read_text(encoding="utf-8"),
+        params={"PARAMS": params.model_dump_json()},
+        display_stdout=True,
+    )
+
+
+def convert(params: Params) -> DataFrame:
+    """Write job requisitions parsed from mail, without displaying or plotting them."""
+    messages = [
+        Message(**message)
+        for message in loads(params.deps.mail.read_text(encoding="utf-8"))
+    ]
+    failures: list[Failure] = []
+    with DigestIndex(params.outs.reqs_index) as index:
+        reqs = update_reqs(
+            messages,
+            params.outs.reqs,
+            index,
+            failures,
+            incremental=params.incremental,
+            workers=params.workers,
+            chunk_size=params.chunk_size,
+            strict=params.strict,
+        )
+    log = get_logger()
+    for failure in failures:
+        log.msg(f"Skipped {failure.error.kind}", error=str(failure.error))
+    with (
+        LocationCache(params.outs.locations) as cache,
+        JobStore(params.outs.jobs) as store,
+    ):
+        store.write(locate(reqs, cache))
+    return reqs
 
 
 if __name__ == "__main__":
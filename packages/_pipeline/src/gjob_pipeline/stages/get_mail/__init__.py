@@ -1,3 +1,4 @@
+from datetime import datetime
 from pathlib import Path
 from typing import Annotated as Ann
 
@@ -10,15 +11,21 @@ from pipeline_helper.models.path import DataDir
 from pydantic import Field
 
 from gjob_pipeline.models.paths import DataFile, paths
+from gjob_pipeline.parser import PairedArg
 
 
 class Deps(stage.Deps):
     stage: DirectoryPathSerPosix = Path(__file__).parent
     mboxes: DataDir = paths.mboxes
+    mail_package: DirectoryPathSerPosix = Path(__file__).parents[2] / "mail"
 
 
 class Outs(stage.Outs):
     mail: DataFile = paths.mail
+    mail_headers: DataDir = paths.mail_headers
+    mail_imap: DataFile = paths.mail_imap
+    mail_index: DataFile = paths.mail_index
+    mail_manifest: DataFile = paths.mail_manifest
 
 
 @command(default_long=True, invoke="gjob_pipeline.stages.get_mail.__main__.main")
@@ -27,3 +34,32 @@ class GetMail(Params[Deps, Outs]):
 
     deps: Ann[Deps, Arg(hidden=True)] = Field(default_factory=Deps)
     outs: Ann[Outs, Arg(hidden=True)] = Field(default_factory=Outs)
+    workers: int = 1
+    """Number of worker processes parsing mailboxes in parallel."""
+    shard_size: int = 2**28
+    """Approximate size in bytes of shards that large mailboxes are split into."""
+    batch_size: int = 1000
+    """Number of files in batches that message directories are split into."""
+    incremental: Ann[bool, PairedArg("incremental")] = True
+    """Only parse messages appended to mailboxes since the last run."""
+    sender: str = "notify-noreply@google.com"
+    """Address in `From` of messages to keep, ignoring case."""
+    subjects: list[str] = []  # noqa: RUF012
+    """Patterns at least one of which subjects must match, if any are given."""
+    since: datetime | None = None
+    """Only get messages sent at or after this date, in UTC if no time zone is given."""
+    until: datetime | None = None
+    """Only get messages sent before this date, in UTC if no time zone is given."""
+    imap_host: str = ""
+    """IMAP server to also fetch new mail from, if any.
+
+    The password is read from the `GJOB_IMAP_PASSWORD` environment variable.
+    """
+    imap_port: int = 993
+    """IMAP server port, connected to over TLS."""
+    imap_user: str = ""
+    """IMAP user name."""
+    imap_folders: list[str] = ["INBOX"]  # noqa: RUF012
+    """IMAP folders to fetch new mail from."""
+    imap_batch_size: int = 100
+    """Number of messages fetched from the IMAP server per command."""
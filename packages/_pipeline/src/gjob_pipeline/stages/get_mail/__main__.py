@@ -1,43 +1,336 @@
-from itertools import chain
-from json import dumps, loads
-from shlex import quote, split
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from imaplib import IMAP4, IMAP4_SSL
+from itertools import chain, repeat
+from json import loads
+from os import environ
+from pathlib import Path
 
-from structlog import get_logger
-
-from gjob_pipeline import just, prettify, temporary_path
-from gjob_pipeline.models import RawMessage
+from gjob_pipeline.mail import Prefilter, get_head_end, get_key, get_raw_message
+from gjob_pipeline.mail.dedup import DedupIndex
+from gjob_pipeline.mail.headers import (
+    SUFFIX,
+    Entry,
+    HeaderIndex,
+    Window,
+    get_index_path,
+)
+from gjob_pipeline.mail.imap import PASSWORD_VARIABLE, Watermarks, fetch_new
+from gjob_pipeline.mail.lazy import LazyMessage
+from gjob_pipeline.mail.maildir import Batch, get_batches, iter_files, scan
+from gjob_pipeline.mail.manifest import Manifest
+from gjob_pipeline.mail.mbox import (
+    Shard,
+    get_shards,
+    is_compressed,
+    iter_located,
+    read_messages,
+)
+from gjob_pipeline.models import Message
 from gjob_pipeline.parser import invoke
+from gjob_pipeline.pretty import dump_records
 from gjob_pipeline.stages.get_mail import GetMail as Params
 
-log = get_logger()
-
 
 def main(params: Params):
-    mail = set(
-        chain.from_iterable(
-            get_messages(mbox.read_text(encoding="utf-8"))
-            for mbox in params.deps.mboxes.iterdir()
-        )
-    )
-    params.outs.mail.write_text(
-        encoding="utf-8",
-        data=prettify(
-            dumps([
-                message.model_dump(mode="json")
-                for message in mail
-                if message.sender
-                == "Job Alerts from Google <notify-noreply@google.com>"
-            ])
-        ),
+    mboxes = sorted(params.deps.mboxes.iterdir())
+    prefilter = Prefilter(sender=params.sender, subjects=tuple(params.subjects))
+    window = Window(since=params.since, until=params.until)
+    manifest = Manifest.read(params.outs.mail_manifest)
+    shards = (
+        manifest.get_shards(mboxes, prefilter, window)
+        if params.incremental and params.outs.mail.exists()
+        else None
     )
+    headers = params.outs.mail_headers
+    headers.mkdir(parents=True, exist_ok=True)
+    with DedupIndex(params.outs.mail_index) as index:
+        indexed: dict[Path, int] = {}
+        if shards is None:
+            index.clear()
+            indexed = {
+                mbox: offset
+                for mbox, offset in manifest.get_indexed(mboxes, prefilter).items()
+                if get_index_path(headers, mbox).exists()
+            }
+            clear_headers(headers, keep=list(indexed))
+            shards = get_unindexed(mboxes, indexed)
+            existing = []
+            watermarks = Watermarks()
+        else:
+            existing = loads(params.outs.mail.read_text(encoding="utf-8"))
+            watermarks = Watermarks.read(params.outs.mail_imap)
+        mail = [
+            *get_indexed_mail(indexed, headers, window, index),
+            *get_mail(
+                shards,
+                prefilter=prefilter,
+                index=index,
+                headers=headers,
+                window=window,
+                workers=params.workers,
+                shard_size=params.shard_size,
+                batch_size=params.batch_size,
+            ),
+        ]
+        if params.imap_host:
+            with IMAP4_SSL(params.imap_host, params.imap_port) as client:
+                client.login(params.imap_user, environ[PASSWORD_VARIABLE])
+                mail.extend(
+                    get_imap_mail(
+                        client,
+                        params.imap_folders,
+                        watermarks,
+                        prefilter=prefilter,
+                        index=index,
+                        window=window,
+                        batch_size=params.imap_batch_size,
+                    )
+                )
+        dump_records(
+            chain(existing, (message.model_dump(mode="json") for message in mail)),
+            params.outs.mail,
+        )
+    manifest.update(mboxes, prefilter, window)
+    manifest.write(params.outs.mail_manifest)
+    watermarks.write(params.outs.mail_imap)
+
+
+def clear_headers(headers: Path, keep: Iterable[Path] = ()):
+    """Remove header indices from a directory, except those of mailboxes to keep."""
+    kept = {get_index_path(headers, mbox).name for mbox in keep}
+    for path in headers.glob(f"*{SUFFIX}*"):
+        if not any(path.name.startswith(name) for name in kept):
+            path.unlink()
+
+
+def get_unindexed(
+    mboxes: Iterable[Path], indexed: dict[Path, int]
+) -> list[Path | Shard]:
+    """Get message directories and shards of mailboxes past their indexed parts.
+
+    Compressed mailboxes are either indexed in full or parsed again in full.
+    """
+    return [
+        mbox
+        if mbox.is_dir()
+        else Shard(mbox)
+        if is_compressed(mbox)
+        else Shard(mbox, start=indexed.get(mbox, 0))
+        for mbox in mboxes
+        if mbox.is_dir()
+        or (
+            mbox not in indexed
+            if is_compressed(mbox)
+            else mbox.stat().st_size > indexed.get(mbox, 0)
+        )
+    ]
+
+
+def get_indexed_mail(
+    indexed: dict[Path, int], headers: Path, window: Window, index: DedupIndex
+) -> list[Message | LazyMessage]:
+    """Get job alerts in a window from the indexed part of mailboxes, without a rescan.
+
+    Only messages in the header index of each mailbox sent within the window are read,
+    in a single pass over each mailbox, and keys of the returned alerts are added to
+    the index.
+    """
+    mail: list[Message | LazyMessage] = []
+    for mbox, offset in indexed.items():
+        with HeaderIndex(get_index_path(headers, mbox), readonly=True) as header_index:
+            entries = [
+                entry
+                for entry in header_index.filter(since=window.since, until=window.until)
+                if entry.offset < offset
+            ]
+        messages = read_messages(mbox, ((e.offset, e.length) for e in entries))
+        for entry, message in zip(entries, messages, strict=True):
+            if not index.add(get_key(message)):
+                continue
+            alert = (
+                get_alert(message)
+                if is_compressed(mbox)
+                else LazyMessage.from_message(mbox, entry.offset, entry.length, message)
+            )
+            if alert is not None:
+                mail.append(alert)
+    return mail
+
+
+def get_imap_mail(
+    client: IMAP4,
+    folders: Iterable[str],
+    watermarks: Watermarks,
+    prefilter: Prefilter,
+    index: DedupIndex,
+    window: Window | None = None,
+    batch_size: int = 100,
+) -> list[Message | LazyMessage]:
+    """Get job alerts from IMAP folders past their watermarks, not yet in the index.
+
+    Only messages from the prefilter sender are fetched, and keys of the returned
+    alerts are added to the index.
+    """
+    mail: list[Message | LazyMessage] = []
+    for folder in folders:
+        for message in fetch_new(
+            client, folder, watermarks, sender=prefilter.sender, batch_size=batch_size
+        ):
+            if not prefilter(message[: get_head_end(message)]):
+                continue
+            entry = Entry.from_message(0, len(message), message)
+            if entry is None or (window and entry.date not in window):
+                continue
+            if (
+                index.add(get_key(message))
+                and (alert := get_alert(message)) is not None
+            ):
+                mail.append(alert)
+    return mail
+
+
+def get_mail(
+    mboxes: Iterable[Path | Shard],
+    prefilter: Prefilter,
+    index: DedupIndex,
+    headers: Path | None = None,
+    window: Window | None = None,
+    workers: int = 1,
+    shard_size: int = 2**28,
+    batch_size: int = 1000,
+) -> list[Message | LazyMessage]:
+    """Get job alerts from mailboxes not yet in the index, parsing them in parallel.
+
+    Mailboxes larger than `shard_size` are split into shards so that a single large
+    mailbox is also parsed across all workers. Maildirs and directories of `.eml` files
+    are scanned concurrently, and their message files split into batches of
+    `batch_size` files parsed across all workers. Keys of the returned alerts are added
+    to the index. If a `headers` directory is given, the headers of messages passing
+    the prefilter are added to the header index of their mailbox in it, whether or
+    not they were sent within the window.
+    """
+    if workers <= 1:
+        return dedup(
+            index,
+            (
+                get_alerts(unit, prefilter, index.path, window)
+                for unit in get_units(mboxes)
+            ),
+            headers,
+        )
+    shards = get_units(mboxes, shard_size, batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # ? Merged in shard order, so that mail is in the same order as a serial parse
+        return dedup(
+            index,
+            executor.map(
+                get_alerts,
+                shards,
+                repeat(prefilter),
+                repeat(index.path),
+                repeat(window),
+            ),
+            headers,
+        )
+
+
+def get_units(
+    mboxes: Iterable[Path | Shard],
+    shard_size: int | None = None,
+    batch_size: int | None = None,
+) -> Iterator[Path | Shard | Batch]:
+    """Get units of mailboxes and message directories to parse, split if sizes given."""
+    for mbox in mboxes:
+        if isinstance(mbox, Path) and mbox.is_dir():
+            yield from (
+                get_batches(mbox, batch_size)
+                if batch_size
+                else [Batch(mbox, tuple(scan(mbox)))]
+            )
+            continue
+        yield from get_shards(mbox, shard_size) if shard_size else [mbox]
+
+
+@dataclass(frozen=True)
+class Alerts:
+    """Keyed job alerts from a mailbox shard or batch, with header index entries."""
+
+    mbox: Path
+    """Mailbox or message directory."""
+    entries: list[Entry]
+    """Header index entries of messages passing the prefilter, for mailboxes only."""
+    alerts: list[tuple[str, Message | LazyMessage]]
+    """Keyed job alerts not yet seen."""
+
+
+def get_alerts(
+    shard: Path | Shard | Batch,
+    prefilter: Prefilter,
+    seen: Path | None = None,
+    window: Window | None = None,
+) -> Alerts:
+    """Get keyed job alerts passing the prefilter from a mailbox, shard or batch.
+
+    Messages sent outside the window or with keys in the index at `seen` are skipped
+    before their bodies are parsed. Alerts from uncompressed mailboxes are lazy, with
+    bodies read from the mailbox only when they are accessed.
+    """
+    shard = shard if isinstance(shard, Shard | Batch) else Shard(shard)
+    lazy = isinstance(shard, Shard) and not is_compressed(shard.mbox)
+    with (
+        DedupIndex(seen, readonly=True) if seen and seen.exists() else nullcontext()
+    ) as index:
+        if isinstance(shard, Batch):
+            alerts = Alerts(shard.directory, [], [])
+            located = ((0, len(m), m) for m in iter_files(shard, prefilter))
+        else:
+            alerts = Alerts(shard.mbox, [], [])
+            located = iter_located(shard, prefilter)
+        for offset, length, message in located:
+            entry = Entry.from_message(offset, length, message)
+            if entry is None:
+                continue
+            if isinstance(shard, Shard):
+                alerts.entries.append(entry)
+            if window and entry.date not in window:
+                continue
+            key = get_key(message)
+            if index and key in index:
+                continue
+            alert = (
+                LazyMessage.from_message(shard.mbox, offset, length, message)
+                if lazy and isinstance(shard, Shard)
+                else get_alert(message)
+            )
+            if alert is not None:
+                alerts.alerts.append((key, alert))
+        return alerts
+
+
+def get_alert(message: bytes) -> Message | None:
+    """Get a job alert from the bytes of a message, or `None` if it has no valid date."""
+    raw = get_raw_message(message)
+    return None if raw is None else Message.model_validate(raw.model_dump())
+
 
+def dedup(
+    index: DedupIndex, results: Iterable[Alerts], headers: Path | None = None
+) -> list[Message | LazyMessage]:
+    """Add keyed alerts to the index in order of results, keeping those not yet seen.
 
-def get_messages(mbox: str) -> list[RawMessage]:
-    with temporary_path() as dep, temporary_path() as out:
-        dep.write_text(encoding="utf-8", data=mbox)
-        cmd = f"proj::convert-mbox-to-json {quote(dep.as_posix())} {quote(out.as_posix())}"
-        log(just(*split(cmd)).stdout.strip())
-        return [RawMessage(**msg) for msg in loads(out.read_text(encoding="utf-8"))]
+    If a `headers` directory is given, header index entries are added to the header
+    index of their mailbox in it.
+    """
+    mail: list[Message | LazyMessage] = []
+    for alerts in results:
+        if headers and alerts.entries:
+            with HeaderIndex(get_index_path(headers, alerts.mbox)) as header_index:
+                header_index.add(alerts.entries)
+        mail.extend(message for key, message in alerts.alerts if index.add(key))
+    return mail
 
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+"""Count or look up jobs in the job store."""
+
+from datetime import date
+from pathlib import Path
+
+from cappa.base import command
+from pydantic import BaseModel
+
+from gjob_pipeline.jobs import Column
+from gjob_pipeline.models.paths import paths
+
+
+@command(default_long=True, invoke="gjob_pipeline.store.__main__.main")
+class Store(BaseModel):
+    """Count or look up jobs in the job store written by the convert stage."""
+
+    path: Path = paths.jobs
+    """Job store."""
+    query: str | None = None
+    """Only jobs for this search query."""
+    state_or_province: str | None = None
+    """Only jobs in this state or province."""
+    city: str | None = None
+    """Only jobs in this city."""
+    company: str | None = None
+    """Only jobs at this company."""
+    source: str | None = None
+    """Only jobs posted on this site."""
+    since: date | None = None
+    """Only jobs posted on or after this date."""
+    until: date | None = None
+    """Only jobs posted on or before this date."""
+    count_by: Column | None = None
+    """Count jobs by the values of this column instead of looking them up."""
+    count: bool = False
+    """Count jobs instead of looking them up."""
+    limit: int = 10
+    """Maximum number of jobs to look up, or all of them if negative."""
@@ -0,0 +1,29 @@
+from gjob_pipeline import get_logger
+from gjob_pipeline.jobs import JobStore, Where
+from gjob_pipeline.parser import invoke
+from gjob_pipeline.store import Store
+
+
+def main(params: Store):
+    """Count or look up jobs in the job store."""
+    where = Where(
+        query=params.query,
+        state_or_province=params.state_or_province,
+        city=params.city,
+        company=params.company,
+        source=params.source,
+        since=params.since,
+        until=params.until,
+    )
+    log = get_logger()
+    with JobStore(params.path, readonly=True) as store:
+        if params.count_by:
+            log.msg("jobs", counts=store.count_by(params.count_by, where))
+        elif params.count:
+            log.msg("jobs", count=store.count(where))
+        else:
+            log.msg("jobs", jobs=store.find(where, params.limit))
+
+
+if __name__ == "__main__":
+    invoke(Store)
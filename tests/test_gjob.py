@@ -1,12 +1,90 @@
 """Tests."""
 
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from email.message import EmailMessage
+from gzip import compress as gzip_compress
+from gzip import decompress as gzip_decompress
+from imaplib import IMAP4
+from json import dumps, loads
+from lzma import compress as lzma_compress
 from os import environ
+from pathlib import Path
+from re import sub
+from subprocess import CalledProcessError, run
+from sys import executable
+from typing import Any
 
 import pytest
+from cappa.output import Exit
+from gjob_pipeline import just, prettify
+from gjob_pipeline.alerts import Failure, parse_alerts, parse_jobs
+from gjob_pipeline.bench import Bench
+from gjob_pipeline.bench.__main__ import get_peak_rss
+from gjob_pipeline.bench.__main__ import main as bench_main
+from gjob_pipeline.digests import DigestIndex
+from gjob_pipeline.jobs import JobStore, Where
+from gjob_pipeline.locations import Location, LocationCache, normalize
+from gjob_pipeline.mail import Prefilter, get_raw_message
+from gjob_pipeline.mail.dedup import DedupIndex
+from gjob_pipeline.mail.headers import HeaderIndex, Window, fetch, get_index_path
+from gjob_pipeline.mail.imap import Watermarks, fetch_new
+from gjob_pipeline.mail.lazy import LazyMessage
+from gjob_pipeline.mail.manifest import Manifest
+from gjob_pipeline.mail.mbox import get_messages, get_shards, iter_located, read_message
+from gjob_pipeline.mail.synthetic import write_mbox
+from gjob_pipeline.models import Alert, Job, Message
+from gjob_pipeline.pretty import dump_records
+from gjob_pipeline.records import get_columns
+from gjob_pipeline.reqs import dump_reqs, get_reqs, locate, parse_reqs, update_reqs
 from gjob_pipeline.stages.convert import Convert
 from gjob_pipeline.stages.convert.__main__ import main as convert_main
 from gjob_pipeline.stages.example import Example
 from gjob_pipeline.stages.example.__main__ import main as example_main
+from gjob_pipeline.stages.get_mail.__main__ import (
+    clear_headers,
+    get_imap_mail,
+    get_indexed_mail,
+    get_mail,
+    get_unindexed,
+)
+from pandas import DataFrame, Series
+
+ALERT_SENDER = "Job Alerts from Google <notify-noreply@google.com>"
+
+
+def make_message(sender: str, subject: str, body: str, day: int = 1) -> bytes:
+    message = EmailMessage()
+    message["From"] = sender
+    message["Subject"] = subject
+    message["Date"] = f"Mon, {day:02} Jan 2024 12:00:00 +0000"
+    message["Message-ID"] = f"<{subject}.{day}@example.com>"
+    message.set_content(body)
+    return message.as_bytes()
+
+
+def make_mbox(path: Path, *messages: bytes) -> Path:
+    path.write_bytes(
+        b"".join(
+            b"From sender@example.com Mon Jan 01 12:00:00 2024\n"
+            + sub(rb"(?m)^(>*From )", rb">\1", message)
+            + b"\n"
+            for message in messages
+        )
+    )
+    return path
+
+
+def dump_mail(mail: Iterable[Message | LazyMessage]) -> list[str]:
+    return [dumps(message.model_dump(mode="json")) for message in mail]
+
+
+@pytest.fixture
+def messages(tmp_path: Path) -> list[Message]:
+    """Synthetic messages that are all job alerts."""
+    mbox = tmp_path / "alerts.mbox"
+    write_mbox(mbox, 60, alert_ratio=1)
+    return list(get_messages(mbox))
 
 
 def test_import():
@@ -14,6 +92,679 @@ def test_import():
     import gjob  # noqa: F401, PLC0415
 
 
+def test_get_messages(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "alert", "From the alert\n>From quoted\n"),
+        make_message("someone@example.com", "noise", "Noise"),
+    )
+    alert, noise = get_messages(mbox)
+    assert alert.sender == ALERT_SENDER
+    assert alert.subject == "alert"
+    assert alert.received.day == 1
+    assert alert.body == "From the alert\n>From quoted\n"
+    assert noise.subject == "noise"
+
+
+def test_get_raw_message():
+    message = EmailMessage()
+    message["From"] = ALERT_SENDER
+    message["Subject"] = "alert"
+    message["Date"] = "Mon, 01 Jan 2024 12:00:00 +0000"
+    message.set_content("Plain text alert ü\n", cte="quoted-printable")
+    message.add_alternative("<p>HTML alert</p>", subtype="html")
+    message.get_payload()[1].add_related(b"logo", "image", "png", cid="<logo>")  # pyright: ignore[reportIndexIssue]
+    raw = get_raw_message(message.as_bytes())
+    assert raw
+    assert raw.body == "Plain text alert ü\n"
+
+
+def test_get_raw_message_unknown_charset():
+    message = b"\n".join([
+        f"From: {ALERT_SENDER}".encode(),
+        b"Subject: alert",
+        b"Date: Mon, 01 Jan 2024 12:00:00 +0000",
+        b"Content-Type: text/plain; charset=unknown-8bit",
+        b"Content-Transfer-Encoding: 8bit",
+        b"",
+        "Plain text alert ü\n".encode(),
+    ])
+    raw = get_raw_message(message)
+    assert raw
+    assert raw.body == "Plain text alert ü\n"
+
+
+def test_invalid_date(tmp_path: Path):
+    date = b"Date: Mon, 01 Jan 2024 12:00:00 +0000\n"
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "missing", "Alert").replace(date, b""),
+        make_message(ALERT_SENDER, "malformed", "Alert").replace(date, b"Date: x\n"),
+        make_message(ALERT_SENDER, "alert", "Alert"),
+    )
+    assert [m.subject for m in get_messages(mbox)] == ["alert"]
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        (alert,) = get_mail([mbox], Prefilter(), index)
+    assert alert.subject == "alert"
+
+
+def test_get_shards(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        *(
+            make_message(ALERT_SENDER, "alert", "From body\n", day)
+            for day in range(1, 10)
+        ),
+    )
+    shards = get_shards(mbox, size=100)
+    assert len(shards) > 1
+    assert [m for s in shards for m in get_messages(s)] == list(get_messages(mbox))
+
+
+def test_get_messages_compressed(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "alert", "From the alert\n>From quoted\n"),
+        make_message("someone@example.com", "noise", "Noise"),
+    )
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    for suffix, compress in ((".gz", gzip_compress), (".xz", lzma_compress)):
+        compressed = tmp_path / f"mbox{suffix}"
+        compressed.write_bytes(compress(mbox.read_bytes()))
+        assert get_shards(compressed, size=10) == get_shards(compressed, size=2**28)
+        assert list(get_messages(compressed)) == list(get_messages(mbox))
+        assert list(get_messages(compressed, prefilter)) == list(
+            get_messages(mbox, prefilter)
+        )
+
+
+def test_get_messages_zstd(tmp_path: Path):
+    zstandard = pytest.importorskip("zstandard")
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "alert", "From the alert\n>From quoted\n"),
+        make_message("someone@example.com", "noise", "Noise"),
+    )
+    compressed = tmp_path / "mbox.zst"
+    compressed.write_bytes(zstandard.ZstdCompressor().compress(mbox.read_bytes()))
+    assert list(get_messages(compressed)) == list(get_messages(mbox))
+    for offset, length, message in iter_located(compressed):
+        assert read_message(compressed, offset, length) == message
+
+
+def test_prefilter(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "Jobs in WA", "Alert"),
+        make_message(ALERT_SENDER, "Other", "Alert"),
+        make_message("someone@example.com", "Jobs in WA", "notify-noreply@google.com"),
+        make_message("Google <NOTIFY-NOREPLY@google.com>", "Jobs in OR", "Alert"),
+        make_message("not-notify-noreply@google.com", "Jobs in ID", "Alert"),
+        make_message("Google <notify-noreply@google.com.example>", "Jobs", "Alert"),
+    )
+    prefilter = Prefilter(sender="notify-noreply@google.com", subjects=("^Jobs",))
+    assert [m.subject for m in get_messages(mbox, prefilter)] == [
+        "Jobs in WA",
+        "Jobs in OR",
+    ]
+
+
+def test_get_mail(tmp_path: Path):
+    mboxes = [
+        make_mbox(
+            tmp_path / f"mbox{i}",
+            make_message(ALERT_SENDER, "alert", "Alert", day=i),
+            make_message(ALERT_SENDER, "alert", "Alert", day=1),
+            make_message("someone@example.com", "noise", "Noise"),
+        )
+        for i in range(1, 4)
+    ]
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        mail = dump_mail(get_mail(mboxes, prefilter, index))
+        assert len(mail) == 3
+        assert not get_mail(mboxes, prefilter, index)
+        for shard_size in [2**28, 100]:
+            index.clear()
+            assert (
+                dump_mail(
+                    get_mail(mboxes, prefilter, index, workers=2, shard_size=shard_size)
+                )
+                == mail
+            )
+
+
+def test_get_mail_order(tmp_path: Path):
+    mboxes = [tmp_path / f"{i}.mbox" for i in range(4)]
+    for i, mbox in enumerate(mboxes):
+        write_mbox(mbox, 50, alert_ratio=0.5, seed=i, start=50 * i)
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        mail = dump_mail(get_mail(mboxes, prefilter, index))
+        index.clear()
+        assert (
+            dump_mail(get_mail(mboxes, prefilter, index, workers=4, shard_size=20_000))
+            == mail
+        )
+
+
+def test_lazy_message(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        make_message(ALERT_SENDER, "alert", "From the alert\n>From quoted\n"),
+    )
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        (lazy,) = get_mail([mbox], Prefilter(), index)
+    assert isinstance(lazy, LazyMessage)
+    assert not hasattr(lazy, "__dict__")
+    (raw,) = get_messages(mbox)
+    assert lazy.to_message() == Message.model_validate(raw.model_dump())
+    assert Message.model_validate(lazy.model_dump(mode="json")) == lazy.to_message()
+
+
+def test_get_mail_directories(tmp_path: Path):
+    maildir = tmp_path / "maildir"
+    for subdir in ["cur", "new", "tmp", ".Folder/cur", ".Folder/new"]:
+        (maildir / subdir).mkdir(parents=True)
+    emls = tmp_path / "emls"
+    (emls / "nested").mkdir(parents=True)
+    files = {
+        maildir / "cur" / "1:2,S": make_message(ALERT_SENDER, "alert", "Alert", 1),
+        maildir / "new" / "2": make_message(ALERT_SENDER, "alert", "Alert", 2),
+        maildir / "tmp" / "3": make_message(ALERT_SENDER, "alert", "Alert", 3),
+        maildir / ".Folder" / "new" / "4": make_message(
+            ALERT_SENDER, "alert", "Alert", 4
+        ),
+        maildir / "new" / "5": make_message("someone@example.com", "noise", "Noise"),
+        emls / "6.eml": make_message(ALERT_SENDER, "alert", "Alert", 6),
+        emls / "nested" / "7.eml": make_message(ALERT_SENDER, "alert", "Alert", 7),
+        emls / "nested" / "2.eml": make_message(ALERT_SENDER, "alert", "Alert", 2),
+        emls / "8.txt": make_message(ALERT_SENDER, "alert", "Alert", 8),
+    }
+    for path, message in files.items():
+        path.write_bytes(message)
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        mail = get_mail([maildir, emls], prefilter, index)
+        assert sorted(m.received.day for m in mail) == [1, 2, 4, 6, 7]
+        index.clear()
+        assert set(
+            get_mail([maildir, emls], prefilter, index, workers=2, batch_size=1)
+        ) == set(mail)
+
+
+class FakeImap:
+    """Stand-in for an IMAP server connection holding a single folder."""
+
+    def __init__(self, messages: list[bytes], uidvalidity: int = 1):
+        self.messages = dict(enumerate(messages, start=1))
+        self.uidvalidity = uidvalidity
+        self.fetches = 0
+
+    def select(self, mailbox: str, readonly: bool = False):  # noqa: ARG002
+        return "OK", [str(len(self.messages)).encode()]
+
+    def response(self, code: str):
+        return code, [str(self.uidvalidity).encode()]
+
+    def uid(self, command: str, *args: str):
+        if command == "SEARCH":
+            start = int(args[1].split(":")[0])
+            sender = args[3].strip('"') if len(args) > 3 else ""
+            uids = [
+                uid
+                for uid, message in self.messages.items()
+                if uid >= start and sender.encode() in message
+            ] or [max(self.messages)]
+            return "OK", [" ".join(map(str, uids)).encode()]
+        self.fetches += 1
+        return "OK", [
+            (f"{uid} (UID {uid} BODY[] {{0}}".encode(), self.messages[int(uid)])
+            for uid in args[0].split(",")
+        ]
+
+
+def test_get_imap_mail(tmp_path: Path):
+    messages = [
+        make_message(ALERT_SENDER, "alert", "Alert", 1),
+        make_message("someone@example.com", "noise", "Noise"),
+        make_message(ALERT_SENDER, "alert", "Alert", 2),
+        make_message(ALERT_SENDER, "alert", "Alert", 3),
+    ]
+    client: Any = FakeImap(messages[:3])
+    watermarks = Watermarks()
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        mail = get_imap_mail(
+            client, ["INBOX"], watermarks, prefilter, index, batch_size=1
+        )
+        assert [m.received.day for m in mail] == [1, 2]
+        assert client.fetches == 2
+        assert watermarks.folders["INBOX"].uid == 3
+        client.messages[4] = messages[3]
+        mail = get_imap_mail(client, ["INBOX"], watermarks, prefilter, index)
+        assert [m.received.day for m in mail] == [3]
+        assert not get_imap_mail(client, ["INBOX"], watermarks, prefilter, index)
+        client.uidvalidity = 2
+        index.clear()
+        assert len(get_imap_mail(client, ["INBOX"], watermarks, prefilter, index)) == 3
+
+
+def test_fetch_new_unselectable():
+    client: Any = FakeImap([make_message(ALERT_SENDER, "alert", "Alert", 1)])
+    client.select = lambda *_, **__: ("NO", [b"[NONEXISTENT] Unknown Mailbox"])
+    with pytest.raises(IMAP4.error, match="Unknown Mailbox"):
+        next(fetch_new(client, "Missing", Watermarks()))
+
+
+def test_header_index(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        *(
+            make_message(ALERT_SENDER, f"alert-{day}", "From body", day)
+            for day in [1, 2, 3]
+        ),
+        make_message("someone@example.com", "noise", "Noise"),
+    )
+    headers = tmp_path / "headers"
+    headers.mkdir()
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        get_mail([mbox], prefilter, index, headers=headers)
+    compressed = tmp_path / "mbox.gz"
+    compressed.write_bytes(gzip_compress(mbox.read_bytes()))
+    with HeaderIndex(get_index_path(headers, mbox)) as header_index:
+        assert len(header_index) == 3
+        (entry,) = header_index.filter(
+            since=datetime(2024, 1, 2, tzinfo=UTC),
+            until=datetime(2024, 1, 3, tzinfo=UTC),
+        )
+        assert entry.sender == "notify-noreply@google.com"
+        assert header_index.get(entry.offset) == entry
+        assert (
+            header_index.filter(subject="alert-3")[0].message_id
+            == "<alert-3.3@example.com>"
+        )
+        assert not header_index.filter(sender="someone@example.com")
+        for m in (mbox, compressed):
+            message = fetch(m, entry)
+            assert message
+            assert message.subject == "alert-2"
+            assert message.body == "From body\n"
+
+
+def test_window(tmp_path: Path):
+    mbox = make_mbox(
+        tmp_path / "mbox",
+        *(
+            make_message(ALERT_SENDER, f"alert-{day}", "Alert", day)
+            for day in [1, 2, 3]
+        ),
+    )
+    headers = tmp_path / "headers"
+    headers.mkdir()
+    window = Window(since=datetime(2024, 1, 2), until=datetime(2024, 1, 3))
+    with DedupIndex(tmp_path / "index.sqlite") as index:
+        (alert,) = get_mail([mbox], Prefilter(), index, headers=headers, window=window)
+        assert alert.subject == "alert-2"
+        index.clear()
+        indexed = get_indexed_mail(
+            {mbox: mbox.stat().st_size},
+            headers,
+            Window(since=datetime(2024, 1, 2)),
+            index,
+        )
+        assert [m.subject for m in indexed] == ["alert-2", "alert-3"]
+
+
+def test_window_compressed(tmp_path: Path):
+    plain = tmp_path / "mbox"
+    write_mbox(plain, 400, alert_ratio=1)
+    mbox = tmp_path / "mbox.gz"
+    mbox.write_bytes(gzip_compress(plain.read_bytes()))
+    headers = tmp_path / "headers"
+    headers.mkdir()
+    prefilter = Prefilter(sender="notify-noreply@google.com")
+    manifest = Manifest()
+
+    def get_count(window: Window) -> int:
+        """Get mail as the stage does when its window changes."""
+        indexed = manifest.get_indexed([mbox], prefilter)
+        clear_headers(headers, keep=list(indexed))
+        with DedupIndex(tmp_path / "index.sqlite") as index:
+            index.clear()
+            mail = [
+                *get_indexed_mail(indexed, headers, window, index),
+                *get_mail(
+                    get_unindexed([mbox], indexed),
+                    prefilter,
+                    index,
+                    headers=headers,
+                    window=window,
+                ),
+            ]
+        manifest.update([mbox], prefilter, window)
+        return len(mail)
+
+    assert get_count(Window()) == 400
+    assert manifest.get_indexed([mbox], prefilter) == {
+        mbox: len(gzip_decompress(mbox.read_bytes()))
+    }
+    assert not get_unindexed([mbox], manifest.get_indexed([mbox], prefilter))
+    assert get_count(Window(since=datetime(2024, 1, 1, 0, 1, tzinfo=UTC))) == 399
+    assert get_count(Window()) == 400
+
+
+def test_manifest(tmp_path: Path):
+    mbox = make_mbox(tmp_path / "mbox", make_message(ALERT_SENDER, "old", "Old"))
+    prefilter = Prefilter()
+    manifest = Manifest()
+    assert manifest.get_shards([mbox], prefilter) is None
+    manifest.update([mbox], prefilter)
+    assert manifest.get_shards([mbox], prefilter) == []
+    assert manifest.get_shards([mbox], Prefilter(sender="other")) is None
+    appended = make_mbox(tmp_path / "new", make_message(ALERT_SENDER, "new", "New"))
+    with mbox.open("ab") as f:
+        f.write(appended.read_bytes())
+    (shard,) = manifest.get_shards([mbox], prefilter) or []
+    assert [m.subject for m in get_messages(shard)] == ["new"]
+    make_mbox(mbox, make_message(ALERT_SENDER, "rewritten", "Rewritten"))
+    assert manifest.get_shards([mbox], prefilter) is None
+
+
+def test_write_mbox(tmp_path: Path):
+    mbox = tmp_path / "mbox"
+    assert write_mbox(mbox, 100, alert_ratio=0.5) == mbox.stat().st_size
+    messages = list(get_messages(mbox))
+    assert len(messages) == 100
+    alerts = list(get_messages(mbox, Prefilter(sender="notify-noreply@google.com")))
+    assert 0 < len(alerts) < len(messages)
+    assert all(alert.body.startswith('"') for alert in alerts)
+
+
+def test_bench(tmp_path: Path):
+    # ? Peak RSS never falls, so the ceiling allows this much growth over the tests so far
+    max_rss = (get_peak_rss() or 0) + 64
+    bench_main(Bench(root=tmp_path, messages=20, max_seconds=600, max_rss=max_rss))
+    assert (tmp_path / "mail.json").exists()
+
+
+def test_bench_over_ceiling(tmp_path: Path):
+    with pytest.raises(Exit) as exc_info:
+        bench_main(Bench(root=tmp_path, messages=20, max_seconds=1e-9))
+    assert exc_info.value.code == 1
+
+
+def test_bench_over_rss_ceiling(tmp_path: Path):
+    if get_peak_rss() is None:
+        pytest.skip("Peak RSS can't be measured on this platform.")
+    with pytest.raises(Exit) as exc_info:
+        bench_main(Bench(root=tmp_path, messages=20, max_rss=1))
+    assert exc_info.value.code == 1
+    assert str(exc_info.value.message).startswith("Peak RSS")
+
+
+def test_parse_alerts(messages: list[Message]):
+    alerts = parse_alerts(messages)
+    assert [a.received for a in alerts] == [m.received for m in messages]
+    assert all(a.footer.startswith("Manage alerts") for a in alerts)
+    crlf = [
+        m.model_copy(update={"body": m.body.replace("\n", "\r\n")}) for m in messages
+    ]
+    assert [a.jobs for a in parse_alerts(crlf)] == [
+        [j.replace("\n", "\r\n") for j in a.jobs] for a in alerts
+    ]
+    jobs = [job for alert in alerts for job in parse_jobs(alert.jobs)]
+    assert jobs
+    assert all(job.logo == f"{job.company} logo" for job in jobs)
+    assert {job.source for job in jobs} <= {
+        "LinkedIn",
+        "Indeed",
+        "Glassdoor",
+        "ZipRecruiter",
+    }
+    assert any(not job.full_time for job in jobs)
+    with pytest.raises(ValueError, match="Could not parse alert"):
+        parse_alerts([messages[0].model_copy(update={"body": "Not an alert"})])
+
+
+def test_parse_alerts_failures(messages: list[Message]):
+    # ? Backtracks catastrophically with a regex parser
+    malformed = messages[0].model_copy(
+        update={"body": '"Query" in Place\nPlace\n' + "Job\n\n\n\n" * 10_000}
+    )
+    failures: list[Failure] = []
+    alerts = parse_alerts([malformed, *messages, malformed], failures)
+    assert len(alerts) == len(messages)
+    assert [f.text for f in failures] == [malformed.body] * 2
+    assert failures[0].error.line == 3
+    jobs = [*alerts[0].jobs, "Not a job"]
+    assert len(parse_jobs(jobs, failures)) == len(alerts[0].jobs)
+    assert failures[-1].text == "Not a job"
+
+
+def test_records(messages: list[Message]):
+    alerts = parse_alerts(messages, strict=True)
+    jobs = parse_jobs(alerts[0].jobs, strict=True)
+    for mode in ("python", "json"):
+        assert [a.model_dump(mode) for a in alerts] == [
+            a.validate().model_dump(mode=mode) for a in alerts
+        ]
+        assert [j.model_dump(mode) for j in jobs] == [
+            Job.model_validate(j.model_dump()).model_dump(mode=mode) for j in jobs
+        ]
+    assert get_columns(jobs)["company"] == [j.company for j in jobs]
+    alerts[0].received = "2024-01-01"  # pyright: ignore[reportAttributeAccessIssue]
+    with pytest.raises(ValueError, match="received"):
+        alerts[0].validate()
+    assert isinstance(alerts[1].validate(), Alert)
+
+
+def test_get_reqs(messages: list[Message]):
+    messages[1] = messages[1].model_copy(
+        update={"body": messages[1].body.replace("\n", "\r\n")}
+    )
+    alerts = parse_alerts(messages)
+    # ? Jobs with multi-line fields are parsed individually
+    alerts[2].jobs[0] = alerts[2].jobs[0].replace("logo\n", "logo\nline\n", 1)
+    expected: dict[str, dict[str, list[dict[str, Any]]]] = {}
+    for alert in alerts:
+        expected.setdefault(alert.query, {}).setdefault(alert.search_location, [])
+        expected[alert.query][alert.search_location].extend(
+            job.model_dump(mode="json") for job in parse_jobs(alert.jobs)
+        )
+    alerts[3].jobs.append("Not a job")
+    failures: list[Failure] = []
+    reqs = get_reqs(alerts, failures)
+    assert [f.text for f in failures] == ["Not a job"]
+    assert dump_reqs(reqs) == expected
+    assert reqs["logo"].str.contains("\n").sum() == 1
+    assert reqs["full_time"].dtype == bool
+    assert get_reqs(alerts, [], strict=True).equals(reqs)
+    with pytest.raises(ValueError, match="Could not parse job"):
+        get_reqs(alerts)
+
+
+def test_parse_reqs(messages: list[Message]):
+    messages[10] = messages[10].model_copy(update={"body": "Not an alert"})
+    failures: list[Failure] = []
+    reqs = parse_reqs(messages, failures)
+    parallel_failures: list[Failure] = []
+    parallel_reqs = parse_reqs(messages, parallel_failures, workers=2, chunk_size=7)
+    assert parallel_reqs.equals(reqs)
+    assert [(f.text, str(f.error)) for f in parallel_failures] == [
+        (f.text, str(f.error)) for f in failures
+    ]
+    assert [f.error.kind for f in failures] == ["alert"]
+    with pytest.raises(ValueError, match="Could not parse alert"):
+        parse_reqs(messages, workers=2, chunk_size=7)
+
+
+def test_update_reqs(tmp_path: Path, messages: list[Message]):
+    reqs_path = tmp_path / "reqs.json"
+    expected = dump_reqs(parse_reqs(messages))
+    with DigestIndex(tmp_path / "reqs_index.sqlite") as index:
+        update_reqs(messages[:20], reqs_path, index)
+        assert len(index) == 20
+        reqs = update_reqs(messages, reqs_path, index)
+        assert len(index) == len(messages)
+        assert dump_reqs(reqs) == expected
+        assert loads(reqs_path.read_text(encoding="utf-8")) == expected
+        assert dump_reqs(update_reqs(messages, reqs_path, index)) == expected
+        reqs = update_reqs(messages[20:], reqs_path, index)
+        assert len(index) == len(messages) - 20
+        assert dump_reqs(reqs) == dump_reqs(parse_reqs(messages[20:]))
+        assert update_reqs([], reqs_path, index).empty
+        assert not len(index)
+        messages[5] = messages[5].model_copy(update={"body": "Not an alert"})
+        for _ in range(2):
+            failures: list[Failure] = []
+            update_reqs(messages, reqs_path, index, failures)
+            assert [f.error.kind for f in failures] == ["alert"]
+            assert len(index) == len(messages) - 1
+        index.connection.execute("PRAGMA user_version = 0")
+    with DigestIndex(tmp_path / "reqs_index.sqlite") as index:
+        assert not len(index)
+
+
+def test_locate():
+    reqs = locate(
+        DataFrame({
+            "search_location": ["United States"] * 4 + ["Canada"],
+            "location": [
+                "Seattle, WA, United States",
+                "WA, United States",
+                "United States",
+                "IBM Thomas J. Watson Research Center, 1101 Kitchawan Rd, Yorktown"
+                " Heights,  \r\nNY, United States",
+                "Montreal, Quebec, Canada",
+            ],
+        })
+    )
+    assert reqs["country"].tolist() == ["United States"] * 4 + ["Canada"]
+    assert reqs["state_or_province"].fillna("").tolist() == ["WA", "WA", "", "NY", "QB"]
+    assert reqs["city"].fillna("").tolist() == [
+        "Seattle",
+        "",
+        "",
+        "New York",
+        "Montreal",
+    ]
+
+
+def test_location_cache(tmp_path: Path):
+    locations = Series([
+        "Seattle, WA, United States",
+        "Remote",
+        "Seattle, WA, United States",
+    ])
+    with LocationCache(tmp_path / "locations.sqlite") as cache:
+        expected = normalize(locations, cache)
+        assert len(cache) == 2
+        cache.add({"Remote": Location("Remote", "Memoized", None)})
+    with LocationCache(tmp_path / "locations.sqlite") as cache:
+        assert normalize(locations, cache)["state_or_province"].tolist() == [
+            "WA",
+            "Memoized",
+            "WA",
+        ]
+        assert normalize(locations).equals(expected)
+
+
+def test_job_store(tmp_path: Path, messages: list[Message]):
+    reqs = locate(parse_reqs(messages))
+    with JobStore(tmp_path / "jobs.sqlite") as store:
+        store.write(reqs)
+        store.write(reqs)
+        assert len(store) == store.count() == len(reqs)
+        query, state_or_province = reqs[["query", "state_or_province"]].iloc[0]
+        where = Where(query=query, state_or_province=state_or_province)
+        expected = reqs[
+            (reqs["query"] == query) & (reqs["state_or_province"] == state_or_province)
+        ]
+        assert store.count(where) == len(expected)
+        assert {
+            city or "": count for city, count in store.count_by("city", where).items()
+        } == expected["city"].fillna("").value_counts().to_dict()
+        job = store.find(where, limit=1)[0]
+        assert job["title"] == expected["title"].iloc[0]
+        assert job["posted"] == expected["posted"].iloc[0].date()
+        assert store.count(Where(since=max(reqs["posted"]).date())) == sum(
+            reqs["posted"] == max(reqs["posted"])
+        )
+
+
+def test_prettify():
+    jobs = {
+        "Query": {
+            "Location": [
+                {"title": "Title", "full_time": True},
+                {"title": "Other", "full_time": False},
+            ],
+            "Other location": [{"title": "Title", "logo": "Logo", "empty": []}],
+        },
+        "Other query": {},
+    }
+    assert prettify(dumps(jobs)) == "\n".join([
+        "{",
+        '  "Query": {',
+        '    "Location": [',
+        '      { "title": "Title", "full_time": true },',
+        '      { "title": "Other", "full_time": false }',
+        "    ],",
+        '    "Other location": [{ "title": "Title", "logo": "Logo", "empty": [] }]',
+        "  },",
+        '  "Other query": {}',
+        "}",
+    ])
+
+
+PRETTIER = sorted(Path(__file__).with_name("prettier").glob("*.json"))
+"""Golden JSON formatted as Prettier would."""
+
+
+@pytest.mark.parametrize("golden", PRETTIER, ids=[path.stem for path in PRETTIER])
+def test_prettify_golden(golden: Path):
+    text = golden.read_text(encoding="utf-8")
+    assert f"{prettify(text)}\n" == text
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("golden", PRETTIER, ids=[path.stem for path in PRETTIER])
+def test_prettier_golden(tmp_path: Path, golden: Path):
+    text = golden.read_text(encoding="utf-8")
+    path = tmp_path / golden.name
+    path.write_text(dumps(loads(text)), encoding="utf-8")
+    try:
+        result = just("run", "prettier", "--no-color", "--parser", "json", str(path))
+    except (FileNotFoundError, CalledProcessError):
+        pytest.skip("Prettier is not available.")
+    assert result.stdout == text
+
+
+@pytest.mark.parametrize(
+    ("records", "expected"),
+    [
+        ([], "[]"),
+        ([{"subject": "Subject"}], '[{ "subject": "Subject" }]'),
+        ([{"subject": "Subject"}, {"subject": ""}], None),
+        ([{"subject": "Subject", "body": "Body " * 20}], None),
+        (
+            [{"subject": "Subject", "body": "Body " * 20}, {"subject": "", "body": ""}],
+            None,
+        ),
+        ([{"subject": ""}, {"subject": "", "body": ""}, {"body": "Body " * 20}], None),
+    ],
+    ids=["empty", "one", "fits", "one-breaks", "breaks", "breaks-late"],
+)
+def test_dump_records(
+    tmp_path: Path, records: list[dict[str, str]], expected: str | None
+):
+    path = tmp_path / "records.json"
+    dump_records(iter(records), path)
+    assert path.read_text(encoding="utf-8") == (expected or prettify(dumps(records)))
+
+
 @pytest.mark.skipif(bool(environ.get("CI")), reason="No example test data yet.")
 @pytest.mark.slow
 def test_example():
@@ -24,3 +775,23 @@ def test_example():
 @pytest.mark.slow
 def test_convert():
     convert_main(Convert())
+
+
+@pytest.mark.skipif(bool(environ.get("CI")), reason="No example test data yet.")
+@pytest.mark.slow
+def test_convert_headless():
+    # ? Checked in a fresh interpreter, since other tests import plotting libraries
+    run(
+        check=True,
+        args=[
+            executable,
+            "-c",
+            "; ".join([
+                "from sys import modules",
+                "from gjob_pipeline.stages.convert import Convert",
+                "from gjob_pipeline.stages.convert.__main__ import main",
+                "main(Convert(headless=True))",
+                "assert not {'matplotlib', 'seaborn'} & set(modules)",
+            ]),
+        ],
+    )